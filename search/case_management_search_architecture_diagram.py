@@ -3,11 +3,52 @@
 Case Management Search Architecture Diagram Generator
 Generates comprehensive diagrams for the Case Management search system
 """
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from matplotlib.patches import Rectangle, FancyBboxPatch, Arrow
+from matplotlib.patches import Rectangle, FancyBboxPatch, Arrow, BoxStyle
 import numpy as np
 
+from pdf_output import output_path, panel
+
+DIAGRAM_DPI = 300
+
+# Seconds resvg gets to rasterize one diagram before the matplotlib fallback
+RESVG_TIMEOUT = 60
+
+def save_diagram(fig, png_path):
+    """Save a diagram as PNG, rasterizing through resvg when it is installed and
+    falling back to matplotlib's own rasterizer when it is missing, fails or
+    times out"""
+    resvg = shutil.which('resvg')
+    if resvg is not None:
+        # Emit vector SVG once to a scratch file and let resvg's native
+        # rasterizer produce the PNG
+        fd, svg_path = tempfile.mkstemp(suffix='.svg')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fig.savefig(fh, format='svg', bbox_inches='tight')
+            result = subprocess.run([resvg, '--dpi', str(DIAGRAM_DPI), svg_path, png_path],
+                                    timeout=RESVG_TIMEOUT)
+            converted = result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            converted = False
+        finally:
+            os.remove(svg_path)
+        if converted:
+            return
+    
+    fig.savefig(png_path, dpi=DIAGRAM_DPI, bbox_inches='tight')
+
+@functools.lru_cache(maxsize=32)
+def box_style(style):
+    """Parse a boxstyle string once and share the BoxStyle across patches"""
+    return BoxStyle(style)
+
 def create_search_architecture_diagram():
     """Creates the main search architecture diagram"""
     fig, ax = plt.subplots(1, 1, figsize=(16, 12))
@@ -31,43 +72,43 @@ def create_search_architecture_diagram():
             ha='center', va='center', fontsize=18, fontweight='bold')
     
     # Client Layer
-    client_box = FancyBboxPatch((5, 85), 25, 8, boxstyle="round,pad=0.3", 
+    client_box = FancyBboxPatch((5, 85), 25, 8, boxstyle=box_style("round,pad=0.3"), 
                                facecolor=colors['client'], edgecolor='black', linewidth=2)
     ax.add_patch(client_box)
     ax.text(17.5, 89, 'Search Clients\n(Web UI, API)', ha='center', va='center', fontsize=10, fontweight='bold')
     
     # API Gateway Layer
-    api_box = FancyBboxPatch((5, 73), 25, 8, boxstyle="round,pad=0.3", 
+    api_box = FancyBboxPatch((5, 73), 25, 8, boxstyle=box_style("round,pad=0.3"), 
                             facecolor=colors['api'], edgecolor='black', linewidth=2)
     ax.add_patch(api_box)
     ax.text(17.5, 77, 'Case Rapid API\n/search endpoints', ha='center', va='center', fontsize=10, fontweight='bold')
     
     # Query Handlers Layer
-    search_handler = FancyBboxPatch((5, 58), 18, 10, boxstyle="round,pad=0.3", 
+    search_handler = FancyBboxPatch((5, 58), 18, 10, boxstyle=box_style("round,pad=0.3"), 
                                    facecolor=colors['handler'], edgecolor='black', linewidth=2)
     ax.add_patch(search_handler)
     ax.text(14, 63, 'SearchHandler\n• Basic Search\n• Pagination\n• Sorting', ha='center', va='center', fontsize=9)
     
-    analytic_handler = FancyBboxPatch((27, 58), 18, 10, boxstyle="round,pad=0.3", 
+    analytic_handler = FancyBboxPatch((27, 58), 18, 10, boxstyle=box_style("round,pad=0.3"), 
                                      facecolor=colors['analytics'], edgecolor='black', linewidth=2)
     ax.add_patch(analytic_handler)
     ax.text(36, 63, 'AnalyticHandler\n• Time-series\n• Aggregations\n• Custom Attrs', ha='center', va='center', fontsize=9)
     
-    facet_handler = FancyBboxPatch((49, 58), 18, 10, boxstyle="round,pad=0.3", 
+    facet_handler = FancyBboxPatch((49, 58), 18, 10, boxstyle=box_style("round,pad=0.3"), 
                                   facecolor=colors['handler'], edgecolor='black', linewidth=2)
     ax.add_patch(facet_handler)
     ax.text(58, 63, 'FacetHandlers\n• Search Facets\n• Autocomplete\n• Get Attributes', ha='center', va='center', fontsize=9)
     
     # Query Parser Layer
-    parser_box = FancyBboxPatch((5, 43), 62, 8, boxstyle="round,pad=0.3", 
-                               facecolor=colors['parser'], edgecolor='black', linewidth=2)
+    parser_box = panel((5, 43), 62, 8, pad=0.3,
+                      facecolor=colors['parser'], edgecolor='black', linewidth=2)
     ax.add_patch(parser_box)
     ax.text(36, 47, 'Query Parser & Builder\n• ANTLR Grammar • ESQueryBuilder • Custom Attribute Support', 
             ha='center', va='center', fontsize=10, fontweight='bold')
     
     # Elasticsearch Layer
-    es_box = FancyBboxPatch((5, 25), 62, 12, boxstyle="round,pad=0.3", 
-                           facecolor=colors['elasticsearch'], edgecolor='black', linewidth=2)
+    es_box = panel((5, 25), 62, 12, pad=0.3,
+                  facecolor=colors['elasticsearch'], edgecolor='black', linewidth=2)
     ax.add_patch(es_box)
     ax.text(36, 31, 'Elasticsearch Cluster\nMain Index: "cases"\nMapping: 393 fields including nested custom_attributes', 
             ha='center', va='center', fontsize=11, fontweight='bold')
@@ -79,15 +120,15 @@ def create_search_architecture_diagram():
             ha='left', va='center', fontsize=8)
     
     # Enrichment Services
-    enrichment_box = FancyBboxPatch((75, 58), 20, 25, boxstyle="round,pad=0.3", 
+    enrichment_box = FancyBboxPatch((75, 58), 20, 25, boxstyle=box_style("round,pad=0.3"), 
                                    facecolor=colors['enrichment'], edgecolor='black', linewidth=2)
     ax.add_patch(enrichment_box)
     ax.text(85, 70.5, 'Enrichment Services\n\n• UserService (OUI)\n• ProjectService\n• CaseTypeService\n\nUUID → Names\nEmail Resolution\nProject Names', 
             ha='center', va='center', fontsize=9, fontweight='bold')
     
     # Analytics Module Details
-    analytics_detail = FancyBboxPatch((5, 5), 62, 15, boxstyle="round,pad=0.3", 
-                                     facecolor=colors['analytics'], edgecolor='black', linewidth=1)
+    analytics_detail = panel((5, 5), 62, 15, pad=0.3,
+                            facecolor=colors['analytics'], edgecolor='black', linewidth=1)
     ax.add_patch(analytics_detail)
     ax.text(36, 12.5, 'Analytics Module Integration', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(8, 9, '• Metrics: count, sum, avg, max, min, percentiles\n• GroupBy: 20+ fields + custom_attributes.*\n• Time Buckets: configurable intervals', 
@@ -95,23 +136,30 @@ def create_search_architecture_diagram():
     ax.text(8, 6, '• Nested Aggregations: custom attributes with reverse_nested\n• Runtime Fields: dynamic metric calculations', 
             ha='left', va='center', fontsize=9)
     
-    # Arrows showing data flow
-    # Client to API
-    ax.arrow(17.5, 85, 0, -2, head_width=1, head_length=1, fc='black', ec='black')
-    # API to Handlers
-    ax.arrow(17.5, 73, 0, -3, head_width=1, head_length=1, fc='black', ec='black')
-    ax.arrow(17.5, 70, 8.5, -7, head_width=1, head_length=1, fc='black', ec='black')
-    ax.arrow(17.5, 70, 40.5, -7, head_width=1, head_length=1, fc='black', ec='black')
-    # Handlers to Parser
-    ax.arrow(36, 58, 0, -5, head_width=1, head_length=1, fc='black', ec='black')
-    # Parser to ES
-    ax.arrow(36, 43, 0, -4, head_width=1, head_length=1, fc='black', ec='black')
-    # Enrichment connection
-    ax.arrow(67, 63, 6, 0, head_width=1, head_length=1, fc='purple', ec='purple')
+    # Arrows showing data flow, as (start, end) points in axis coordinates
+    arrow_starts = np.array([
+        [17.5, 85],                          # Client to API
+        [17.5, 73], [17.5, 70], [17.5, 70],  # API to Handlers
+        [36, 58],                            # Handlers to Parser
+        [36, 43],                            # Parser to ES
+        [67, 63],                            # Enrichment connection
+    ])
+    arrow_ends = np.array([
+        [17.5, 83],
+        [17.5, 70], [26, 63], [58, 63],
+        [36, 53],
+        [36, 39],
+        [73, 63],
+    ])
+    arrow_colors = ['black'] * 6 + ['purple']
+    arrow_deltas = arrow_ends - arrow_starts
+
+    for (x, y), (dx, dy), color in zip(arrow_starts, arrow_deltas, arrow_colors):
+        ax.arrow(x, y, dx, dy, head_width=1, head_length=1, fc=color, ec=color)
     
     plt.tight_layout()
-    plt.savefig('/Users/agustin.fusaro/search_architecture.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    save_diagram(fig, output_path('search_architecture.png'))
+    plt.close(fig)
 
 def create_elasticsearch_mapping_diagram():
     """Creates detailed Elasticsearch mapping structure diagram"""
@@ -125,56 +173,56 @@ def create_elasticsearch_mapping_diagram():
             ha='center', va='center', fontsize=16, fontweight='bold')
     
     # Core Fields Section
-    core_box = FancyBboxPatch((5, 75), 40, 15, boxstyle="round,pad=0.5", 
-                             facecolor='#E8F4FD', edgecolor='black', linewidth=2)
+    core_box = panel((5, 75), 40, 15, pad=0.5,
+                    facecolor='#E8F4FD', edgecolor='black', linewidth=2)
     ax.add_patch(core_box)
     ax.text(25, 87, 'Core Case Fields', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(7, 80, '• internal_id, case_id, public_id (keyword)\n• assignee_id, created_by (keyword)\n• project_id, org_id (keyword/long)\n• status, priority, type_id (long)\n• created_at, modified_at (date)\n• title, description (text)', 
             ha='left', va='center', fontsize=9)
     
     # Custom Attributes Section  
-    custom_box = FancyBboxPatch((55, 75), 40, 15, boxstyle="round,pad=0.5", 
-                               facecolor='#FFE5B4', edgecolor='black', linewidth=2)
+    custom_box = panel((55, 75), 40, 15, pad=0.5,
+                      facecolor='#FFE5B4', edgecolor='black', linewidth=2)
     ax.add_patch(custom_box)
     ax.text(75, 87, 'Custom Attributes (Nested)', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(57, 80, '• Type: "nested" (not flattened object)\n• key (keyword) - attribute name\n• value_text (text) - string values\n• value_number (text + as_double) - numeric\n• Enables complex nested queries', 
             ha='left', va='center', fontsize=9)
     
     # Analytics Section
-    analytics_box = FancyBboxPatch((5, 55), 40, 15, boxstyle="round,pad=0.5", 
-                                  facecolor='#F0E68C', edgecolor='black', linewidth=2)
+    analytics_box = panel((5, 55), 40, 15, pad=0.5,
+                         facecolor='#F0E68C', edgecolor='black', linewidth=2)
     ax.add_patch(analytics_box)
     ax.text(25, 67, 'Analytics Fields', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(7, 60, '• analytics.status_* (object)\n• spans (date_range) - time periods\n• total (long) - duration metrics\n• Supports time-based aggregations\n• Pre-computed metrics storage', 
             ha='left', va='center', fontsize=9)
     
     # Additional Properties Section
-    additional_box = FancyBboxPatch((55, 55), 40, 15, boxstyle="round,pad=0.5", 
-                                   facecolor='#D8BFD8', edgecolor='black', linewidth=2)
+    additional_box = panel((55, 55), 40, 15, pad=0.5,
+                          facecolor='#D8BFD8', edgecolor='black', linewidth=2)
     ax.add_patch(additional_box)
     ax.text(75, 67, 'Additional Properties', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(57, 60, '• event_management.* - incident data\n• on_call.* - responder information\n• change_request.* - CR metadata\n• campaign.* - campaign data\n• Flattened structure for easy querying', 
             ha='left', va='center', fontsize=9)
     
     # Attributes Section
-    attr_box = FancyBboxPatch((5, 35), 40, 15, boxstyle="round,pad=0.5", 
-                             facecolor='#B8E6B8', edgecolor='black', linewidth=2)
+    attr_box = panel((5, 35), 40, 15, pad=0.5,
+                    facecolor='#B8E6B8', edgecolor='black', linewidth=2)
     ax.add_patch(attr_box)
     ax.text(25, 47, 'Standard Attributes', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(7, 40, '• attributes (flattened) - key-value pairs\n• service, team, version, datacenter\n• rule_id, follow_up_incident_public_id\n• Used for faceted search and filtering\n• Direct field access for performance', 
             ha='left', va='center', fontsize=9)
     
     # Integration Fields Section
-    integration_box = FancyBboxPatch((55, 35), 40, 15, boxstyle="round,pad=0.5", 
-                                    facecolor='#FFCCCB', edgecolor='black', linewidth=2)
+    integration_box = panel((55, 35), 40, 15, pad=0.5,
+                           facecolor='#FFCCCB', edgecolor='black', linewidth=2)
     ax.add_patch(integration_box)
     ax.text(75, 47, 'Integration Fields', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(57, 40, '• jira_issue.* - Jira integration\n• servicenow_ticket.* - ServiceNow\n• insights.* - ML insights\n• notification_handles.* - alerting\n• External system synchronization', 
             ha='left', va='center', fontsize=9)
     
     # Mapping Statistics
-    stats_box = FancyBboxPatch((5, 15), 90, 15, boxstyle="round,pad=0.5", 
-                              facecolor='#F5F5F5', edgecolor='black', linewidth=2)
+    stats_box = panel((5, 15), 90, 15, pad=0.5,
+                     facecolor='#F5F5F5', edgecolor='black', linewidth=2)
     ax.add_patch(stats_box)
     ax.text(50, 27, 'Index Mapping Statistics', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(7, 20, '• Total Properties: 393+ fields\n• Dynamic Mapping: false (explicit schema)\n• Nested Objects: custom_attributes\n• Flattened Objects: attributes, additional_properties', 
@@ -183,8 +231,8 @@ def create_elasticsearch_mapping_diagram():
             ha='left', va='center', fontsize=10)
     
     plt.tight_layout()
-    plt.savefig('/Users/agustin.fusaro/elasticsearch_mapping.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    save_diagram(fig, output_path('elasticsearch_mapping.png'))
+    plt.close(fig)
 
 def create_query_flow_diagram():
     """Creates the query processing flow diagram"""
@@ -209,8 +257,8 @@ def create_query_flow_diagram():
     ]
     
     for i, (title, desc, y, color) in enumerate(steps):
-        box = FancyBboxPatch((10, y-4), 80, 8, boxstyle="round,pad=0.5", 
-                            facecolor=color, edgecolor='black', linewidth=2)
+        box = panel((10, y-4), 80, 8, pad=0.5,
+                   facecolor=color, edgecolor='black', linewidth=2)
         ax.add_patch(box)
         ax.text(15, y, title, ha='left', va='center', fontsize=12, fontweight='bold')
         ax.text(15, y-2, desc, ha='left', va='center', fontsize=9)
@@ -220,8 +268,8 @@ def create_query_flow_diagram():
             ax.arrow(50, y-4, 0, -4, head_width=2, head_length=1, fc='black', ec='black')
     
     plt.tight_layout()
-    plt.savefig('/Users/agustin.fusaro/query_flow.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    save_diagram(fig, output_path('query_flow.png'))
+    plt.close(fig)
 
 def create_analytics_aggregation_diagram():
     """Creates analytics aggregation structure diagram"""
@@ -235,20 +283,20 @@ def create_analytics_aggregation_diagram():
             ha='center', va='center', fontsize=16, fontweight='bold')
     
     # Root Aggregation
-    root_box = FancyBboxPatch((35, 85), 30, 8, boxstyle="round,pad=0.3", 
+    root_box = FancyBboxPatch((35, 85), 30, 8, boxstyle=box_style("round,pad=0.3"), 
                              facecolor='#F0E68C', edgecolor='black', linewidth=2)
     ax.add_patch(root_box)
     ax.text(50, 89, 'Root Aggregation', ha='center', va='center', fontsize=12, fontweight='bold')
     
     # Group By Options
-    normal_group = FancyBboxPatch((5, 68), 35, 12, boxstyle="round,pad=0.3", 
+    normal_group = FancyBboxPatch((5, 68), 35, 12, boxstyle=box_style("round,pad=0.3"), 
                                  facecolor='#B8E6B8', edgecolor='black', linewidth=2)
     ax.add_patch(normal_group)
     ax.text(22.5, 76, 'Standard GroupBy', ha='center', va='center', fontsize=11, fontweight='bold')
     ax.text(22.5, 71, 'Terms/MultiTerms Aggregation\n• assignee, status, priority\n• project, service, team\n• Single/Multiple fields', 
             ha='center', va='center', fontsize=9)
     
-    custom_group = FancyBboxPatch((60, 68), 35, 12, boxstyle="round,pad=0.3", 
+    custom_group = FancyBboxPatch((60, 68), 35, 12, boxstyle=box_style("round,pad=0.3"), 
                                  facecolor='#FFE5B4', edgecolor='black', linewidth=2)
     ax.add_patch(custom_group)
     ax.text(77.5, 76, 'Custom Attributes GroupBy', ha='center', va='center', fontsize=11, fontweight='bold')
@@ -256,7 +304,7 @@ def create_analytics_aggregation_diagram():
             ha='center', va='center', fontsize=9)
     
     # Time Buckets
-    time_box = FancyBboxPatch((35, 48), 30, 12, boxstyle="round,pad=0.3", 
+    time_box = FancyBboxPatch((35, 48), 30, 12, boxstyle=box_style("round,pad=0.3"), 
                              facecolor='#D8BFD8', edgecolor='black', linewidth=2)
     ax.add_patch(time_box)
     ax.text(50, 56, 'Time Bucket Aggregation', ha='center', va='center', fontsize=11, fontweight='bold')
@@ -264,7 +312,7 @@ def create_analytics_aggregation_diagram():
             ha='center', va='center', fontsize=9)
     
     # Metrics
-    metrics_box = FancyBboxPatch((35, 28), 30, 12, boxstyle="round,pad=0.3", 
+    metrics_box = FancyBboxPatch((35, 28), 30, 12, boxstyle=box_style("round,pad=0.3"), 
                                 facecolor='#FFCCCB', edgecolor='black', linewidth=2)
     ax.add_patch(metrics_box)
     ax.text(50, 36, 'Metric Aggregation', ha='center', va='center', fontsize=11, fontweight='bold')
@@ -272,8 +320,8 @@ def create_analytics_aggregation_diagram():
             ha='center', va='center', fontsize=9)
     
     # Custom Attribute Detail
-    detail_box = FancyBboxPatch((5, 5), 90, 18, boxstyle="round,pad=0.5", 
-                               facecolor='#F5F5F5', edgecolor='black', linewidth=2)
+    detail_box = panel((5, 5), 90, 18, pad=0.5,
+                      facecolor='#F5F5F5', edgecolor='black', linewidth=2)
     ax.add_patch(detail_box)
     ax.text(50, 20, 'Custom Attribute Aggregation Details', ha='center', va='center', fontsize=12, fontweight='bold')
     ax.text(7, 12, 'Structure: nested → filter → terms → reverse_nested → date_range → metric\n\n1. Nested: Enter custom_attributes array\n2. Filter: Match specific attribute key (e.g., "environment")\n3. Terms: Group by text_values.keyword or number_values.as_double\n4. Reverse_nested: Exit to parent document for time calculations\n5. Date_range: Create time buckets\n6. Metric: Apply aggregation method (count, avg, etc.)', 
@@ -287,8 +335,8 @@ def create_analytics_aggregation_diagram():
     ax.arrow(50, 48, 0, -6, head_width=1.5, head_length=1.5, fc='black', ec='black')
     
     plt.tight_layout()
-    plt.savefig('/Users/agustin.fusaro/analytics_aggregation.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    save_diagram(fig, output_path('analytics_aggregation.png'))
+    plt.close(fig)
 
 if __name__ == "__main__":
     print("Generating Case Management Search Architecture Diagrams...")
@@ -4,131 +4,177 @@ Case Management Search Flow Guide Generator
 Creates a comprehensive book-style guide explaining the complete search flow
 with detailed examples and step-by-step explanations
 """
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-from matplotlib.patches import FancyBboxPatch
-import matplotlib.patches as mpatches
+from dataclasses import dataclass
 from datetime import datetime
+import functools
 import json
+import os
 import textwrap
-
-def create_title_page(pdf_pages):
-    """Create the title page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    # Title
-    ax.text(50, 75, 'The Complete Guide to', 
-            ha='center', va='center', fontsize=20, style='italic')
-    ax.text(50, 68, 'Case Management Search', 
-            ha='center', va='center', fontsize=28, fontweight='bold')
-    ax.text(50, 60, 'From User Query to Frontend Response', 
-            ha='center', va='center', fontsize=16, style='italic')
-    
-    # Subtitle box
-    title_box = FancyBboxPatch((10, 45), 80, 10, boxstyle="round,pad=1", 
-                              facecolor='#E8F4FD', edgecolor='navy', linewidth=2)
-    ax.add_patch(title_box)
-    ax.text(50, 50, 'A Deep Dive into Query Processing, Elasticsearch Integration,\nand Result Transformation in Datadog Case Management', 
-            ha='center', va='center', fontsize=12, fontweight='bold')
-    
-    # Author and Date
-    ax.text(50, 35, f'Generated on: {datetime.now().strftime("%B %d, %Y")}', 
-            ha='center', va='center', fontsize=12)
-    ax.text(50, 30, 'Technical Documentation Series', 
-            ha='center', va='center', fontsize=12, style='italic')
-    
-    # Bottom decoration
-    ax.text(50, 15, 'Understanding the complete journey from user input\nto structured frontend data', 
-            ha='center', va='center', fontsize=11, style='italic', alpha=0.7)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_table_of_contents(pdf_pages):
-    """Create table of contents"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Table of Contents', 
-            ha='center', va='center', fontsize=20, fontweight='bold')
-    
-    toc_text = """
-Chapter 1: Introduction to the Search Journey ......................................................... 3
-    Understanding the Complete Flow
-    The Three Types of Search Operations
-    
-Chapter 2: Basic Search - From Query to Results ...................................................... 4
-    The Simple Search Journey
-    User Input: "status:open AND priority:high"
-    Query Parsing and Transformation
-    Elasticsearch Query Construction
-    Result Processing and Response
-    
-Chapter 3: Analytics Search - Time Series and Aggregations ...................................... 8
-    The Analytics Journey
-    User Input: Group by Status over Time
-    Complex Aggregation Building
-    Nested Custom Attribute Handling
-    Time Bucket Generation
-    Metrics Calculation and Compression
-    
-Chapter 4: Facet Search - Discovery and Autocomplete ............................................ 12
-    The Facet Discovery Journey
-    Available Facets Retrieval
-    Facet Value Searching with Partial Matching
-    Autocomplete Functionality
-    
-Chapter 5: Advanced Query Patterns ................................................................. 15
-    Custom Attribute Queries
-    Complex Boolean Logic
-    Date Range Queries
-    Nested Object Handling
-    
-Chapter 6: Elasticsearch Deep Dive ................................................................. 18
-    Query DSL Construction
-    Aggregation Architecture
-    Index Structure and Mapping
-    Performance Considerations
-    
-Chapter 7: Result Processing and Enrichment ........................................................ 21
-    Document Deserialization
-    UUID Resolution and Enrichment
-    Response Formatting
-    Frontend Data Structure
-    
-Chapter 8: Error Handling and Edge Cases ........................................................... 24
-    Query Validation
-    Elasticsearch Error Processing
-    Timeout Handling
-    Graceful Degradation
-    
-Appendix A: Complete Query Examples .............................................................. 26
-Appendix B: Elasticsearch JSON Examples ........................................................... 28
-Appendix C: Response Structure Examples .......................................................... 30
-    """
-    
-    ax.text(5, 85, toc_text.strip(), ha='left', va='top', fontsize=10, 
-            fontfamily='monospace')
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_introduction(pdf_pages):
-    """Create introduction chapter"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 1: Introduction to the Search Journey', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    intro_text = """
+from string import Template
+
+from pdf_output import PDF_RC, atomic_pdf, fonts, is_up_to_date, output_path, page_figure, save_page, source_digest
+
+# Formatted once so every page generated in this session carries the same date.
+# It is also part of the guide's source digest, so a guide skipped as up to
+# date never carries a stale date.
+GENERATED_AT = datetime.now().strftime("%B %d, %Y")
+
+# Matplotlib is imported where it is first needed, so importing this module
+# (e.g. to inspect PAGES) does not pay its startup cost.
+
+@functools.lru_cache(maxsize=None)
+def wrap_text(text, width=80):
+    """Wrap a chapter body once; later runs and pages reuse the cached result"""
+    return textwrap.fill(text, width=width)
+
+def inline_json(obj):
+    """An example for prose that gets reflowed, on one line with single spaces"""
+    return json.dumps(obj, separators=(', ', ': '))
+
+def new_page(ax):
+    """Remove the previous page's text and boxes from the shared axes"""
+    for artist in [*ax.texts, *ax.collections]:
+        artist.remove()
+
+@dataclass(frozen=True)
+class TextBlock:
+    """A run of text placed in the page's 0-100 axes coordinates"""
+    x: float
+    y: float
+    text: str
+    fontsize: float
+    ha: str = 'left'
+    va: str = 'top'
+    font: str = None
+    alpha: float = None
+    wrap_width: int = None
+    
+    def draw(self, ax):
+        text = wrap_text(self.text, self.wrap_width) if self.wrap_width else self.text
+        font = fonts()[self.font] if self.font else None
+        ax.text(self.x, self.y, text, ha=self.ha, va=self.va, fontsize=self.fontsize,
+                fontproperties=font, alpha=self.alpha)
+
+@dataclass(frozen=True)
+class BoxBlock:
+    """A decorative rounded box drawn on the page"""
+    x: float
+    y: float
+    width: float
+    height: float
+    facecolor: str
+    edgecolor: str
+    linewidth: float
+    boxstyle: str = 'round,pad=1'
+    
+    def patch(self):
+        from matplotlib.patches import FancyBboxPatch
+        return FancyBboxPatch((self.x, self.y), self.width, self.height, boxstyle=self.boxstyle,
+                              facecolor=self.facecolor, edgecolor=self.edgecolor,
+                              linewidth=self.linewidth)
+
+@dataclass(frozen=True)
+class Page:
+    """A guide page; pages that open a section carry a progress label"""
+    blocks: tuple
+    label: str = None
+
+def heading(text, fontsize=18):
+    """Bold, centered page heading"""
+    return TextBlock(50, 95, text, fontsize, ha='center', va='center', font='bold')
+
+def chapter_page(title, body, fontsize, title_size=18, label=None):
+    """A heading followed by one body of prose wrapped at 80 columns"""
+    return Page((heading(title, title_size), TextBlock(5, 85, body, fontsize, wrap_width=80)), label)
+
+def render_page(ax, page):
+    """Draw a page's blocks onto the shared axes, replacing the previous page.
+    Boxes are batched into a single PatchCollection."""
+    new_page(ax)
+    boxes = [block.patch() for block in page.blocks if isinstance(block, BoxBlock)]
+    if boxes:
+        from matplotlib.collections import PatchCollection
+        ax.add_collection(PatchCollection(boxes, match_original=True))
+    for block in page.blocks:
+        if isinstance(block, TextBlock):
+            block.draw(ax)
+
+TOC_WIDTH = 75
+
+TOC_ENTRIES = (
+    ('Chapter 1: Introduction to the Search Journey', 3, (
+        'Understanding the Complete Flow',
+        'The Three Types of Search Operations',
+    )),
+    ('Chapter 2: Basic Search - From Query to Results', 4, (
+        'The Simple Search Journey',
+        'User Input: "status:open AND priority:high"',
+        'Query Parsing and Transformation',
+        'Elasticsearch Query Construction',
+        'Result Processing and Response',
+    )),
+    ('Chapter 3: Analytics Search - Time Series and Aggregations', 8, (
+        'The Analytics Journey',
+        'User Input: Group by Status over Time',
+        'Complex Aggregation Building',
+        'Nested Custom Attribute Handling',
+        'Time Bucket Generation',
+        'Metrics Calculation and Compression',
+    )),
+    ('Chapter 4: Facet Search - Discovery and Autocomplete', 12, (
+        'The Facet Discovery Journey',
+        'Available Facets Retrieval',
+        'Facet Value Searching with Partial Matching',
+        'Autocomplete Functionality',
+    )),
+    ('Chapter 5: Advanced Query Patterns', 15, (
+        'Custom Attribute Queries',
+        'Complex Boolean Logic',
+        'Date Range Queries',
+        'Nested Object Handling',
+    )),
+    ('Chapter 6: Elasticsearch Deep Dive', 18, (
+        'Query DSL Construction',
+        'Aggregation Architecture',
+        'Index Structure and Mapping',
+        'Performance Considerations',
+    )),
+    ('Chapter 7: Result Processing and Enrichment', 21, (
+        'Document Deserialization',
+        'UUID Resolution and Enrichment',
+        'Response Formatting',
+        'Frontend Data Structure',
+    )),
+    ('Chapter 8: Error Handling and Edge Cases', 24, (
+        'Query Validation',
+        'Elasticsearch Error Processing',
+        'Timeout Handling',
+        'Graceful Degradation',
+    )),
+    ('Appendix A: Complete Query Examples', 26, ()),
+    ('Appendix B: Elasticsearch JSON Examples', 28, ()),
+    ('Appendix C: Response Structure Examples', 30, ()),
+)
+
+def toc_line(title, page, width=TOC_WIDTH):
+    """Join a title and page number with a dot leader that right-aligns the number"""
+    page = str(page)
+    leader = '.' * max(width - len(title) - len(page) - 2, 3)
+    return f'{title} {leader} {page}'
+
+def build_toc(entries):
+    """Lay out TOC entries as monospace lines, indenting each entry's sections"""
+    lines = []
+    for title, page, sections in entries:
+        lines.append(toc_line(title, page))
+        if sections:
+            lines.extend(f'    {section}' for section in sections)
+            lines.append('')
+    return '\n'.join(lines)
+
+TOC_TEXT = build_toc(TOC_ENTRIES)
+
+INTRO_TEXT = """
 When a user types a query into the Case Management interface, they initiate a complex journey through multiple layers of sophisticated software architecture. This journey transforms human-readable search terms into optimized Elasticsearch queries, executes them against massive datasets, processes the results through enrichment pipelines, and finally delivers structured data back to the frontend for presentation.
 
 Understanding this complete flow is crucial for developers, architects, and engineers working with the Case Management system. Each step in this process involves careful orchestration of parsing, validation, transformation, execution, and response formatting. The system handles three distinct types of search operations, each with its own unique characteristics and processing patterns.
@@ -142,27 +188,9 @@ The third type is Facet Search, which enables discovery and autocomplete functio
 Throughout this guide, we will follow complete examples of each search type, examining the actual code paths, Elasticsearch queries, and response transformations. We will see how a simple user input like "status:open" becomes a complex Elasticsearch bool query with security filters, how analytics queries generate nested aggregations with time buckets, and how the system transforms raw Elasticsearch responses into the structured data that powers the frontend interfaces.
 
 Each chapter builds upon the previous one, creating a comprehensive understanding of how search works in the Case Management domain. By the end of this guide, you will understand not just what happens during a search, but why each transformation is necessary and how all the pieces fit together to create a seamless user experience.
-    """
-    
-    wrapped_text = textwrap.fill(intro_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=11, 
-            wrap=True)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_basic_search_chapter(pdf_pages):
-    """Create basic search chapter with detailed examples"""
-    # Page 1 - Introduction to Basic Search
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 2: Basic Search - From Query to Results', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    basic_search_intro = """
+"""
+
+BASIC_SEARCH_INTRO_TEXT = """
 Basic search represents the most common interaction users have with the Case Management system. When a user enters a query like "status:open AND priority:high" into the search interface, they expect to see a list of cases that match their criteria, paginated and sorted appropriately. Behind this seemingly simple operation lies a sophisticated pipeline that ensures accuracy, security, and performance.
 
 The journey begins when the user submits their query through the web interface. The frontend application constructs a SearchQuery protobuf message containing the user's input along with additional parameters like pagination settings, sort preferences, and time range filters. This message is then sent to the Case Rapid API, which validates the request and routes it to the appropriate handler.
@@ -176,24 +204,29 @@ The ANTLR parser processes this input and generates an abstract syntax tree that
 Next, the ESQueryBuilder takes this parsed structure and transforms it into Elasticsearch Query DSL. For our example query, this involves creating a bool query with three must clauses. The status field becomes a term query, the priority field requires special handling because priorities are stored as numeric enum values, and the assignee field needs to support both UUID and email lookups through the user enrichment system.
 
 However, before the query is executed, the system applies crucial security filters. The queryBuilder automatically adds organization ID filtering to ensure users only see cases from their own organization. It also integrates with the ProjectService to determine which projects the user has access to, adding additional project ID filters to the query. This security layer operates transparently, ensuring that users never see data they should not have access to.
-    """
-    
-    wrapped_text = textwrap.fill(basic_search_intro, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-    
-    # Page 2 - Query Transformation Example
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Query Transformation in Detail', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    transformation_text = """
+"""
+
+# The Elasticsearch query generated for the chapter 2 example
+BASIC_SEARCH_EXAMPLE_QUERY = {
+    'query': {
+        'bool': {
+            'must': [
+                {'term': {'status': 1}},
+                {'term': {'priority': 3}},
+                {'term': {'assignee_id': '550e8400-e29b-41d4-a716-446655440000'}},
+                {'term': {'org_id': 12345}},
+                {'terms': {'project_id': ['proj-1', 'proj-2', 'proj-3']}},
+            ]
+        }
+    },
+    'size': 10,
+    'from': 0,
+    'sort': [
+        {'created_at': {'order': 'desc'}},
+    ],
+}
+
+BASIC_SEARCH_TRANSFORMATION_TEXT = Template("""
 To understand the transformation process, let us examine the exact steps that occur when processing our example query "status:open AND priority:high AND assignee:john.doe@datadog.com".
 
 The ANTLR parser first tokenizes this input, identifying keywords, operators, field names, and values. It recognizes "status", "priority", and "assignee" as field identifiers, "open", "high", and the email address as values, and "AND" as boolean operators. The parser then constructs an abstract syntax tree where the root node is an AND operation with three child nodes representing the field-value pairs.
@@ -208,44 +241,12 @@ The final Elasticsearch query structure becomes a complex bool query with multip
 
 Here is the actual Elasticsearch query that would be generated:
 
-{
-  "query": {
-    "bool": {
-      "must": [
-        { "term": { "status": 1 } },
-        { "term": { "priority": 3 } },
-        { "term": { "assignee_id": "550e8400-e29b-41d4-a716-446655440000" } },
-        { "term": { "org_id": 12345 } },
-        { "terms": { "project_id": ["proj-1", "proj-2", "proj-3"] } }
-      ]
-    }
-  },
-  "size": 10,
-  "from": 0,
-  "sort": [
-    { "created_at": { "order": "desc" } }
-  ]
-}
+$example_query
 
 This query demonstrates how a simple user input becomes a sophisticated Elasticsearch query with proper security filtering, data type handling, and performance optimizations.
-    """
-    
-    wrapped_text = textwrap.fill(transformation_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-    
-    # Page 3 - Execution and Response Processing
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Execution and Response Processing', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    execution_text = """
+""").substitute(example_query=inline_json(BASIC_SEARCH_EXAMPLE_QUERY))
+
+BASIC_SEARCH_EXECUTION_TEXT = """
 Once the Elasticsearch query is constructed and validated, the system executes it against the cases index. The SearchHandler configures the query with additional parameters including pagination settings, sorting preferences, and field selection options. If the user has specified that they only want certain fields returned, the system adds a source filter to reduce the amount of data transferred from Elasticsearch.
 
 The query execution occurs within a configured timeout context, typically five seconds for basic searches. This timeout ensures that slow queries do not impact system performance or user experience. The system sends the query to the Elasticsearch cluster and waits for the response.
@@ -265,26 +266,9 @@ For example, the assignee_id field contains a UUID that identifies the assigned
 The enrichment process operates efficiently by batching requests for related identifiers. Rather than making individual service calls for each UUID, the system collects all unique identifiers that need resolution and makes batch requests to the appropriate services. This approach minimizes network overhead and improves response times.
 
 Finally, the system constructs the SearchResponse protobuf message that will be returned to the client. This response includes the enriched case objects, pagination metadata such as total count and page count, and any additional context information that the frontend might need for rendering the results.
-    """
-    
-    wrapped_text = textwrap.fill(execution_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_analytics_search_chapter(pdf_pages):
-    """Create analytics search chapter with detailed examples"""
-    # Page 1 - Analytics Search Introduction
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 3: Analytics Search - Time Series and Aggregations', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    analytics_intro = """
+"""
+
+ANALYTICS_INTRO_TEXT = """
 Analytics search represents the most sophisticated and computationally intensive operation in the Case Management search system. When users interact with dashboards, generate reports, or explore trends over time, they are utilizing the powerful analytics capabilities that transform raw case data into meaningful insights through complex aggregations and time-series analysis.
 
 The analytics journey begins when a user configures a dashboard widget or runs a report that requires aggregated data. For example, a user might want to see the number of cases grouped by status over the past month, with data points every day. This seemingly simple request requires the system to perform multi-level aggregations across potentially millions of documents, handle time bucketing, and process custom attributes through Elasticsearch's nested object capabilities.
@@ -300,31 +284,33 @@ For our example query, the system constructs a multi-level aggregation pipeline.
 The complexity increases significantly when custom attributes are involved in the grouping. Custom attributes in the Case Management system are stored as nested objects in Elasticsearch, which requires special aggregation handling. When a user wants to group by a custom attribute like "environment" or "service", the system must construct nested aggregations that first enter the custom_attributes array, filter for the specific attribute key, group by the attribute values, and then use reverse nested aggregations to access the parent document for time bucketing.
 
 The time bucketing logic itself involves sophisticated calculations to determine the appropriate bucket size and count. The system takes the requested time range and interval, calculates how many buckets would be created, and ensures that the total does not exceed configured limits. If the requested granularity would create too many buckets, the system automatically adjusts to a larger interval while maintaining the overall time coverage.
-    """
-    
-    wrapped_text = textwrap.fill(analytics_intro, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-    
-    # Page 2 - Complex Aggregation Building
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Complex Aggregation Architecture', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    aggregation_text = """
+"""
+
+HOUR_MS = 60 * 60 * 1000
+
+def hourly_ranges(start_ms, end_ms):
+    """One-hour date_range buckets covering start_ms to end_ms"""
+    edges = range(start_ms, end_ms + 1, HOUR_MS)
+    return [{'from': start, 'to': end} for start, end in zip(edges, edges[1:])]
+
+def range_excerpt(ranges, shown=2, indent=14):
+    """The first few ranges as JSON lines, with a comment counting the rest"""
+    lines = [f'{{ "from": {r["from"]}, "to": {r["to"]} }},' for r in ranges[:shown]]
+    lines.append(f'// ... {len(ranges) - shown} more hourly ranges')
+    return '\n'.join(' ' * indent + line for line in lines)
+
+# Seven days of hourly buckets from 2022-01-01T00:00:00Z, as in the chapter 3 example
+EXAMPLE_DAYS = 7
+EXAMPLE_RANGES = hourly_ranges(1640995200000, 1640995200000 + EXAMPLE_DAYS * 24 * HOUR_MS)
+
+ANALYTICS_AGGREGATION_TEXT = Template("""
 To understand the sophistication of analytics aggregations, let us examine the exact Elasticsearch query structure that would be generated for our example: case counts grouped by status and assignee over seven days with hourly buckets.
 
 The system begins by constructing the base query with time range and security filters, similar to basic search. However, instead of returning document hits, the query sets the size parameter to zero and focuses entirely on aggregations. The aggregation structure becomes the heart of the query, containing multiple nested levels that work together to produce the desired grouping and time series data.
 
 At the root level, the system creates a multi_terms aggregation that groups documents by both status and assignee_id fields simultaneously. This aggregation tells Elasticsearch to create buckets where each bucket represents a unique combination of status and assignee values. The system configures this aggregation with appropriate size limits and sorting to ensure performance and relevance.
 
-Within each multi_terms bucket, the system adds a date_range aggregation that divides the seven-day time period into hourly intervals. The date range calculation involves creating 168 individual time ranges (24 hours × 7 days), each representing a one-hour period. Each range specifies exact from and to timestamps in milliseconds, ensuring precise time bucketing.
+Within each multi_terms bucket, the system adds a date_range aggregation that divides the seven-day time period into hourly intervals. The date range calculation involves creating ${range_count} individual time ranges (24 hours × ${days} days), each representing a one-hour period. Each range specifies exact from and to timestamps in milliseconds, ensuring precise time bucketing.
 
 The resulting Elasticsearch aggregation structure looks like this:
 
@@ -343,9 +329,7 @@ The resulting Elasticsearch aggregation structure looks like this:
           "date_range": {
             "field": "created_at",
             "ranges": [
-              { "from": 1640995200000, "to": 1640998800000 },
-              { "from": 1640998800000, "to": 1641002400000 },
-              // ... 166 more hourly ranges
+$hourly_ranges
             ]
           }
         }
@@ -361,24 +345,10 @@ When custom attributes are involved in the grouping, the aggregation structure b
 The nested aggregation first enters the custom_attributes array context, then applies a filter aggregation to find documents where the custom attribute key equals "environment". Within this filtered context, it creates a terms aggregation on the custom attribute value, then uses a reverse_nested aggregation to return to the parent document context for time bucketing.
 
 This nested structure ensures that the system can group by custom attribute values while still maintaining access to the parent document's timestamp and other fields needed for time bucketing and additional filtering.
-    """
-    
-    wrapped_text = textwrap.fill(aggregation_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-    
-    # Page 3 - Result Processing and Compression
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Result Processing and Compression', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    result_processing_text = """
+""").substitute(hourly_ranges=range_excerpt(EXAMPLE_RANGES), range_count=len(EXAMPLE_RANGES),
+               days=EXAMPLE_DAYS)
+
+ANALYTICS_RESULT_PROCESSING_TEXT = """
 When Elasticsearch returns the aggregation results, the response contains a complex nested structure that mirrors the aggregation hierarchy. The AnalyticHandler must carefully traverse this structure, extracting the relevant data points and transforming them into the time-series format expected by the frontend visualization components.
 
 The extraction process begins at the root aggregation and works its way down through each level. For our example query with status-assignee grouping, the system first extracts the multi_terms buckets, each representing a unique status-assignee combination. The bucket key contains an array with the status value and assignee UUID, while the bucket contains the nested time_bucket_aggr aggregation.
@@ -398,25 +368,9 @@ The system addresses this through sophisticated compression and optimization tec
 The MetricsBuffer format uses LZ4 compression to reduce the response payload size significantly. The system compresses the epochs array (timestamp data), values array (numeric data), and includes metadata about group counts and time bucket counts. This compressed format can reduce response sizes by 70-80% while maintaining fast decompression on the frontend.
 
 The final response structure provides everything the frontend needs to render interactive time-series visualizations. It includes the compressed data arrays, group labels with human-readable names, time range metadata, and aggregation method information. The frontend can efficiently decompress this data and feed it directly into charting libraries without additional processing.
-    """
-    
-    wrapped_text = textwrap.fill(result_processing_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_facet_search_chapter(pdf_pages):
-    """Create facet search chapter"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 4: Facet Search - Discovery and Autocomplete', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    facet_intro = """
+"""
+
+FACET_INTRO_TEXT = """
 Facet search enables users to discover and explore the available search dimensions within their case data. When users interact with search filters, dropdown menus, or autocomplete suggestions, they are utilizing sophisticated facet search capabilities that help them understand what data is available and construct more effective queries.
 
 The facet search system operates through several specialized handlers that work together to provide discovery and suggestion functionality. The GetFacetsHandler returns the list of available facets that users can search by, while the SearchFacetValuesHandler enables users to find specific values within those facets. The SearchAutocompleteHandler provides real-time suggestions as users type their queries.
@@ -434,25 +388,9 @@ For a query like "find assignees whose names contain 'john'", the system constru
 The SearchAutocompleteHandler provides real-time suggestions as users type. When a user types "stat" into a search field, the system recognizes this as a potential field name and returns suggestions like "status". When they continue typing "status:op", the system recognizes they are looking for status values and suggests "status:open", "status:opened", etc.
 
 This autocomplete functionality requires sophisticated parsing and prediction logic that can understand partial queries, suggest completions for both field names and values, and handle complex query structures with boolean operators and nested expressions.
-    """
-    
-    wrapped_text = textwrap.fill(facet_intro, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_advanced_patterns_chapter(pdf_pages):
-    """Create advanced query patterns chapter"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 5: Advanced Query Patterns', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    advanced_text = """
+"""
+
+ADVANCED_PATTERNS_TEXT = """
 The Case Management search system supports sophisticated query patterns that enable users to construct complex searches involving custom attributes, boolean logic, date ranges, and nested object queries. Understanding these patterns is crucial for developers who need to extend the system or troubleshoot complex search scenarios.
 
 Custom attribute queries represent one of the most complex patterns in the system. When a user searches for "custom_attributes.environment:production", they are requesting cases where a specific custom attribute has a particular value. This seemingly simple query requires the system to construct a nested Elasticsearch query that can search within the custom_attributes array.
@@ -470,25 +408,9 @@ Boolean logic handling requires careful precedence management and parentheses su
 The ANTLR grammar defines operator precedence rules that ensure AND operations bind more tightly than OR operations, while parentheses can override default precedence. The resulting syntax tree must properly represent the user's intended logic structure, which the ESQueryBuilder then transforms into appropriately nested bool queries in Elasticsearch.
 
 Range queries extend beyond dates to include numeric fields and support various comparison operators. Users can search for cases with specific comment counts using queries like "comment_count:>5" or "comment_count:[1 TO 10]". The system must recognize these patterns and construct the appropriate range queries with the correct boundary conditions.
-    """
-    
-    wrapped_text = textwrap.fill(advanced_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_elasticsearch_deep_dive(pdf_pages):
-    """Create Elasticsearch deep dive chapter"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 6: Elasticsearch Deep Dive', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    es_deep_dive = """
+"""
+
+ES_DEEP_DIVE_TEXT = """
 The Elasticsearch integration in the Case Management system represents a sophisticated implementation that leverages advanced features of the Elasticsearch platform. Understanding the specific patterns, optimizations, and design decisions helps explain why the system performs well under load and handles complex queries efficiently.
 
 The cases index uses a carefully designed mapping that balances search performance with storage efficiency. The mapping disables dynamic field creation to maintain strict schema control, ensuring that all fields have appropriate types and analyzers. This approach prevents mapping explosions that can occur when dynamic content creates numerous unexpected fields.
@@ -510,25 +432,9 @@ Query construction follows patterns optimized for Elasticsearch performance. Boo
 Aggregations leverage Elasticsearch's sophisticated aggregation framework. Terms aggregations benefit from field data caching and efficient bucket generation. Date range aggregations use optimized time-based indexing structures. Nested aggregations carefully manage context switching to maintain performance while providing accurate results for custom attributes.
 
 The system implements query optimization strategies including field selection to reduce network transfer, appropriate use of source filtering to limit returned data, and careful timeout management to prevent slow queries from impacting system performance.
-    """
-    
-    wrapped_text = textwrap.fill(es_deep_dive, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_result_processing_chapter(pdf_pages):
-    """Create result processing and enrichment chapter"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 7: Result Processing and Enrichment', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    result_processing = """
+"""
+
+RESULT_PROCESSING_TEXT = """
 The transformation of raw Elasticsearch responses into user-friendly frontend data represents one of the most critical aspects of the search system. This process involves multiple stages of parsing, validation, enrichment, and formatting that ensure users receive accurate, complete, and meaningful information.
 
 When Elasticsearch returns search results, the response contains raw JSON documents that represent the stored case data. These documents use internal identifiers, enum values, and technical field names that are not suitable for direct presentation to users. The system must transform this technical data into human-readable information while maintaining data integrity and relationships.
@@ -550,25 +456,9 @@ Batch processing optimization ensures that enrichment operations perform efficie
 The enrichment system handles failures gracefully by providing fallback behavior when service calls fail or return incomplete data. If a user UUID cannot be resolved, the system retains the UUID in the response rather than failing the entire request. This approach ensures that users receive as much information as possible even when some enrichment operations fail.
 
 Response formatting creates the final structure that frontends receive. The system constructs protobuf response messages that include enriched case objects, pagination metadata, search statistics, and any error information that clients might need for proper handling.
-    """
-    
-    wrapped_text = textwrap.fill(result_processing, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_error_handling_chapter(pdf_pages):
-    """Create error handling chapter"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Chapter 8: Error Handling and Edge Cases', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    error_handling = """
+"""
+
+ERROR_HANDLING_TEXT = """
 Robust error handling throughout the search pipeline ensures that users receive meaningful feedback when queries fail and that the system degrades gracefully under various failure conditions. The search system encounters numerous potential failure points, from invalid user input to Elasticsearch cluster issues, and must handle each scenario appropriately.
 
 Query validation begins at the earliest stage when user input is received. The ANTLR parser can encounter syntax errors when users provide malformed queries with unbalanced parentheses, invalid operators, or unrecognized field names. When parsing failures occur, the system returns specific error messages that help users understand and correct their query syntax.
@@ -590,25 +480,9 @@ Large result set handling addresses scenarios where queries return more data tha
 Invalid aggregation configurations can occur when users request analytics queries with parameters that don't make sense or would be computationally expensive. The system validates analytics requests to ensure that time ranges are reasonable, grouping fields are valid, and bucket counts are within acceptable limits.
 
 Graceful degradation strategies ensure that partial failures don't prevent users from accessing any data. When some shards are unavailable, Elasticsearch can return partial results with warnings. The search system propagates these warnings to users while still providing the available data, allowing them to make informed decisions about whether the partial results are sufficient for their needs.
-    """
-    
-    wrapped_text = textwrap.fill(error_handling, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_query_examples_appendix(pdf_pages):
-    """Create appendix with complete query examples"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Appendix A: Complete Query Examples', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    examples_text = """
+"""
+
+QUERY_EXAMPLES_TEXT = """
 BASIC SEARCH EXAMPLES:
 
 1. Simple field search:
@@ -670,24 +544,9 @@ FACET SEARCH EXAMPLES:
 4. Custom attribute facet discovery:
    Request: Find available custom attribute keys
    Response: [environment, service, team, region, ...]
-    """
-    
-    ax.text(5, 85, examples_text, ha='left', va='top', fontsize=9, fontfamily='monospace')
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_elasticsearch_json_appendix(pdf_pages):
-    """Create appendix with Elasticsearch JSON examples"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Appendix B: Elasticsearch JSON Examples', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    json_examples = """
+"""
+
+ES_JSON_EXAMPLES_TEXT = """
 BASIC SEARCH QUERY:
 {
   "query": {
@@ -755,24 +614,9 @@ ANALYTICS AGGREGATION:
     }
   }
 }
-    """
-    
-    ax.text(5, 85, json_examples, ha='left', va='top', fontsize=8, fontfamily='monospace')
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_response_structure_appendix(pdf_pages):
-    """Create appendix with response structure examples"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Appendix C: Response Structure Examples', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    response_examples = """
+"""
+
+RESPONSE_EXAMPLES_TEXT = """
 BASIC SEARCH RESPONSE:
 {
   "cases": [
@@ -829,53 +673,76 @@ FACET VALUES RESPONSE:
   ],
   "total_count": 43
 }
-    """
-    
-    ax.text(5, 85, response_examples, ha='left', va='top', fontsize=9, fontfamily='monospace')
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+"""
 
-def generate_search_flow_guide():
-    """Generate the complete search flow guide PDF"""
-    pdf_path = '/Users/agustin.fusaro/Case_Management_Search_Flow_Guide.pdf'
+PAGES = (
+    Page((
+        TextBlock(50, 75, 'The Complete Guide to', 20, ha='center', va='center', font='italic'),
+        TextBlock(50, 68, 'Case Management Search', 28, ha='center', va='center', font='bold'),
+        TextBlock(50, 60, 'From User Query to Frontend Response', 16, ha='center', va='center',
+                  font='italic'),
+        BoxBlock(10, 45, 80, 10, facecolor='#E8F4FD', edgecolor='navy', linewidth=2),
+        TextBlock(50, 50, 'A Deep Dive into Query Processing, Elasticsearch Integration,\nand Result Transformation in Datadog Case Management',
+                  12, ha='center', va='center', font='bold'),
+        TextBlock(50, 35, f'Generated on: {GENERATED_AT}', 12,
+                  ha='center', va='center'),
+        TextBlock(50, 30, 'Technical Documentation Series', 12, ha='center', va='center',
+                  font='italic'),
+        TextBlock(50, 15, 'Understanding the complete journey from user input\nto structured frontend data', 11,
+                  ha='center', va='center', font='italic', alpha=0.7),
+    ), label='title page'),
+    Page((heading('Table of Contents', 20), TextBlock(5, 85, TOC_TEXT, 10, font='mono')),
+         label='table of contents'),
+    chapter_page('Chapter 1: Introduction to the Search Journey', INTRO_TEXT, 11,
+                 label='introduction'),
+    chapter_page('Chapter 2: Basic Search - From Query to Results', BASIC_SEARCH_INTRO_TEXT, 10,
+                 label='basic search chapter'),
+    chapter_page('Query Transformation in Detail', BASIC_SEARCH_TRANSFORMATION_TEXT, 9, title_size=16),
+    chapter_page('Execution and Response Processing', BASIC_SEARCH_EXECUTION_TEXT, 9, title_size=16),
+    chapter_page('Chapter 3: Analytics Search - Time Series and Aggregations', ANALYTICS_INTRO_TEXT, 10,
+                 label='analytics search chapter'),
+    chapter_page('Complex Aggregation Architecture', ANALYTICS_AGGREGATION_TEXT, 9, title_size=16),
+    chapter_page('Result Processing and Compression', ANALYTICS_RESULT_PROCESSING_TEXT, 9, title_size=16),
+    chapter_page('Chapter 4: Facet Search - Discovery and Autocomplete', FACET_INTRO_TEXT, 10,
+                 label='facet search chapter'),
+    chapter_page('Chapter 5: Advanced Query Patterns', ADVANCED_PATTERNS_TEXT, 10,
+                 label='advanced patterns chapter'),
+    chapter_page('Chapter 6: Elasticsearch Deep Dive', ES_DEEP_DIVE_TEXT, 10,
+                 label='Elasticsearch deep dive'),
+    chapter_page('Chapter 7: Result Processing and Enrichment', RESULT_PROCESSING_TEXT, 10,
+                 label='result processing chapter'),
+    chapter_page('Chapter 8: Error Handling and Edge Cases', ERROR_HANDLING_TEXT, 10,
+                 label='error handling chapter'),
+    Page((heading('Appendix A: Complete Query Examples', 16),
+          TextBlock(5, 85, QUERY_EXAMPLES_TEXT, 9, font='mono')), label='appendices'),
+    Page((heading('Appendix B: Elasticsearch JSON Examples', 16),
+          TextBlock(5, 85, ES_JSON_EXAMPLES_TEXT, 8, font='mono'))),
+    Page((heading('Appendix C: Response Structure Examples', 16),
+          TextBlock(5, 85, RESPONSE_EXAMPLES_TEXT, 9, font='mono'))),
+)
+
+def generate_search_flow_guide(force=False):
+    """Generate the complete search flow guide PDF, unless the existing one was
+    built today from the same source (pass force=True to rebuild regardless)"""
+    pdf_path = output_path('Case_Management_Search_Flow_Guide.pdf')
+    
+    digest = source_digest(__file__, extra=GENERATED_AT)
+    if not force and is_up_to_date(pdf_path, digest):
+        print("Guide is up to date, skipping regeneration")
+        return pdf_path
+    
+    import matplotlib
+    from matplotlib.backends.backend_pdf import PdfPages
+    
+    fig, ax = page_figure(dpi=72)
+    with matplotlib.rc_context(PDF_RC), atomic_pdf(pdf_path, digest) as fh, \
+            PdfPages(fh) as pdf_pages:
+        for page in PAGES:
+            if page.label:
+                print(f"Creating {page.label}...")
+            render_page(ax, page)
+            save_page(pdf_pages, fig, bbox_inches='tight', facecolor='white')
     
-    with PdfPages(pdf_path) as pdf_pages:
-        print("Creating title page...")
-        create_title_page(pdf_pages)
-        
-        print("Creating table of contents...")
-        create_table_of_contents(pdf_pages)
-        
-        print("Creating introduction...")
-        create_introduction(pdf_pages)
-        
-        print("Creating basic search chapter...")
-        create_basic_search_chapter(pdf_pages)
-        
-        print("Creating analytics search chapter...")
-        create_analytics_search_chapter(pdf_pages)
-        
-        print("Creating facet search chapter...")
-        create_facet_search_chapter(pdf_pages)
-        
-        print("Creating advanced patterns chapter...")
-        create_advanced_patterns_chapter(pdf_pages)
-        
-        print("Creating Elasticsearch deep dive...")
-        create_elasticsearch_deep_dive(pdf_pages)
-        
-        print("Creating result processing chapter...")
-        create_result_processing_chapter(pdf_pages)
-        
-        print("Creating error handling chapter...")
-        create_error_handling_chapter(pdf_pages)
-        
-        print("Creating appendices...")
-        create_query_examples_appendix(pdf_pages)
-        create_elasticsearch_json_appendix(pdf_pages)
-        create_response_structure_appendix(pdf_pages)
-        
     return pdf_path
 
 if __name__ == "__main__":
@@ -883,7 +750,6 @@ if __name__ == "__main__":
     pdf_path = generate_search_flow_guide()
     print(f"✓ Guide generated: {pdf_path}")
     
-    import os
     file_size = os.path.getsize(pdf_path) / (1024*1024)
     print(f"✓ File size: {file_size:.1f} MB")
-    print(f"✓ Complete guide with examples and detailed explanations")
\ No newline at end of file
+    print(f"✓ Complete guide with examples and detailed explanations")
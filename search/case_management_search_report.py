@@ -3,20 +3,36 @@
 Case Management Search Feature Analysis Report Generator
 Generates a comprehensive PDF report on the search architecture
 """
-import matplotlib.pyplot as plt
+import matplotlib
 from matplotlib.backends.backend_pdf import PdfPages
 from matplotlib.patches import FancyBboxPatch
-import matplotlib.image as mpimg
 from datetime import datetime
-import numpy as np
 import os
 
-def create_title_page(pdf_pages):
-    """Create the title page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
+from pdf_output import PDF_RC, atomic_pdf, is_up_to_date, output_dir, output_path, page_figure, save_page, source_digest
+
+# The title page shows the date only, which is also part of the report's
+# source digest, so a report skipped as up to date never carries a stale date
+GENERATED_AT = datetime.now().strftime("%Y-%m-%d")
+
+PDF_METADATA = {
+    'Title': 'Case Management Search Architecture',
+    'Subject': 'Technical Analysis Report',
+}
+
+def new_page(ax):
+    """Reset the shared axes so the next page starts from a blank canvas. Only
+    the previous page's artists are removed; a full ax.clear() would also
+    rebuild the tick machinery, which these hidden axes never draw."""
+    for artist in [*ax.texts, *ax.patches, *ax.images]:
+        artist.remove()
     ax.set_xlim(0, 100)
     ax.set_ylim(0, 100)
     ax.axis('off')
+
+def create_title_page(pdf_pages, fig, ax):
+    """Create the title page"""
+    new_page(ax)
     
     # Title
     ax.text(50, 80, 'Case Management Search Architecture', 
@@ -32,7 +48,7 @@ def create_title_page(pdf_pages):
             ha='center', va='center', fontsize=14)
     
     # Author and Date
-    ax.text(50, 45, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', 
+    ax.text(50, 45, f'Generated on: {GENERATED_AT}', 
             ha='center', va='center', fontsize=12)
     ax.text(50, 40, 'Datadog Case Management Team', 
             ha='center', va='center', fontsize=12, style='italic')
@@ -45,22 +61,9 @@ def create_title_page(pdf_pages):
     ax.text(50, 27, '• 393+ Elasticsearch fields\n• 7 specialized query handlers\n• Nested custom attributes support\n• Multi-environment deployment (US1, EU1, AP1+)', 
             ha='center', va='center', fontsize=11)
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+    save_page(pdf_pages, fig)
 
-def create_executive_summary(pdf_pages):
-    """Create executive summary page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    # Title
-    ax.text(50, 95, 'Executive Summary', 
-            ha='center', va='center', fontsize=20, fontweight='bold')
-    
-    # Main content
-    summary_text = """
+SUMMARY_TEXT = """
 The Case Management domain implements a sophisticated search architecture built on Elasticsearch, 
 providing comprehensive search capabilities for case data across multiple Datadog environments.
 
@@ -98,27 +101,23 @@ KEY FINDINGS:
 
 The system demonstrates enterprise-grade search capabilities with strong separation of concerns,
 robust error handling, and comprehensive logging for debugging and monitoring.
-    """
-    
-    ax.text(5, 85, summary_text.strip(), ha='left', va='top', fontsize=10, 
-            wrap=True, bbox=dict(boxstyle="round,pad=1", facecolor='#F8F8F8', alpha=0.8))
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+""".strip()
 
-def create_architecture_overview(pdf_pages):
-    """Create architecture overview page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+def create_executive_summary(pdf_pages, fig, ax):
+    """Create executive summary page"""
+    new_page(ax)
     
     # Title
-    ax.text(50, 95, 'Search Architecture Overview', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
+    ax.text(50, 95, 'Executive Summary', 
+            ha='center', va='center', fontsize=20, fontweight='bold')
     
-    # Architecture components
-    components_text = """
+    # Main content
+    ax.text(5, 85, SUMMARY_TEXT, ha='left', va='top', fontsize=10,
+            bbox=dict(boxstyle="round,pad=1", facecolor='#F8F8F8', alpha=0.8))
+    
+    save_page(pdf_pages, fig)
+
+COMPONENTS_TEXT = """
 COMPONENT BREAKDOWN:
 
 1. CLIENT LAYER
@@ -157,27 +156,23 @@ COMPONENT BREAKDOWN:
    • ProjectService - Project ID to name mapping
    • CaseTypeService - Case type enrichment
    • Real-time data enrichment post-query
-    """
-    
-    ax.text(5, 85, components_text.strip(), ha='left', va='top', fontsize=9,
-            bbox=dict(boxstyle="round,pad=1", facecolor='#F0F8FF', alpha=0.8))
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+""".strip()
 
-def create_elasticsearch_details(pdf_pages):
-    """Create Elasticsearch details page"""  
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+def create_architecture_overview(pdf_pages, fig, ax):
+    """Create architecture overview page"""
+    new_page(ax)
     
     # Title
-    ax.text(50, 95, 'Elasticsearch Index Structure', 
+    ax.text(50, 95, 'Search Architecture Overview', 
             ha='center', va='center', fontsize=18, fontweight='bold')
     
-    # Details
-    es_details = """
+    # Architecture components
+    ax.text(5, 85, COMPONENTS_TEXT, ha='left', va='top', fontsize=9,
+            bbox=dict(boxstyle="round,pad=1", facecolor='#F0F8FF', alpha=0.8))
+    
+    save_page(pdf_pages, fig)
+
+ES_DETAILS_TEXT = """
 INDEX: "cases" (393+ Fields)
 
 CORE FIELDS:
@@ -220,26 +215,23 @@ PERFORMANCE CONSIDERATIONS:
 • Keyword fields: not_analyzed for exact matching
 • Date fields: optimized for range queries
 • Nested fields: isolated document storage for complex queries
-    """
-    
-    ax.text(5, 85, es_details.strip(), ha='left', va='top', fontsize=9,
-            bbox=dict(boxstyle="round,pad=1", facecolor='#FFF8DC', alpha=0.8))
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+""".strip()
 
-def create_analytics_integration(pdf_pages):
-    """Create analytics integration details page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)  
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+def create_elasticsearch_details(pdf_pages, fig, ax):
+    """Create Elasticsearch details page"""  
+    new_page(ax)
     
     # Title
-    ax.text(50, 95, 'Analytics Module Integration', 
+    ax.text(50, 95, 'Elasticsearch Index Structure', 
             ha='center', va='center', fontsize=18, fontweight='bold')
     
-    analytics_details = """
+    # Details
+    ax.text(5, 85, ES_DETAILS_TEXT, ha='left', va='top', fontsize=9,
+            bbox=dict(boxstyle="round,pad=1", facecolor='#FFF8DC', alpha=0.8))
+    
+    save_page(pdf_pages, fig)
+
+ANALYTICS_DETAILS_TEXT = """
 ANALYTICS HANDLER (analytic_handler.go:1520 lines)
 
 SUPPORTED METRICS:
@@ -288,26 +280,22 @@ RESPONSE FORMAT:
 • Time-series data optimized for frontend consumption
 • Groups, epochs, and values arrays
 • Supports Datadog's metrics infrastructure
-    """
-    
-    ax.text(5, 85, analytics_details.strip(), ha='left', va='top', fontsize=9,
-            bbox=dict(boxstyle="round,pad=1", facecolor='#F0E68C', alpha=0.8))
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+""".strip()
 
-def create_query_processing_flow(pdf_pages):
-    """Create query processing flow page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+def create_analytics_integration(pdf_pages, fig, ax):
+    """Create analytics integration details page"""
+    new_page(ax)
     
     # Title
-    ax.text(50, 95, 'Query Processing Flow', 
+    ax.text(50, 95, 'Analytics Module Integration', 
             ha='center', va='center', fontsize=18, fontweight='bold')
     
-    flow_details = """
+    ax.text(5, 85, ANALYTICS_DETAILS_TEXT, ha='left', va='top', fontsize=9,
+            bbox=dict(boxstyle="round,pad=1", facecolor='#F0E68C', alpha=0.8))
+    
+    save_page(pdf_pages, fig)
+
+FLOW_DETAILS_TEXT = """
 QUERY PROCESSING PIPELINE:
 
 1. INPUT PARSING (ANTLR Parser)
@@ -361,26 +349,22 @@ SUPPORTED QUERY PATTERNS:
 • Range: "created_at:[now-7d TO now]"
 • Custom attributes: "custom_attributes.environment:production"
 • Complex: "(status:open OR status:in_progress) AND assignee:user123"
-    """
-    
-    ax.text(5, 85, flow_details.strip(), ha='left', va='top', fontsize=9,
-            bbox=dict(boxstyle="round,pad=1", facecolor='#E6E6FA', alpha=0.8))
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+""".strip()
 
-def create_deployment_architecture(pdf_pages):
-    """Create deployment architecture page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+def create_query_processing_flow(pdf_pages, fig, ax):
+    """Create query processing flow page"""
+    new_page(ax)
     
     # Title
-    ax.text(50, 95, 'Deployment Architecture', 
+    ax.text(50, 95, 'Query Processing Flow', 
             ha='center', va='center', fontsize=18, fontweight='bold')
     
-    deployment_details = """
+    ax.text(5, 85, FLOW_DETAILS_TEXT, ha='left', va='top', fontsize=9,
+            bbox=dict(boxstyle="round,pad=1", facecolor='#E6E6FA', alpha=0.8))
+    
+    save_page(pdf_pages, fig)
+
+DEPLOYMENT_DETAILS_TEXT = """
 MULTI-ENVIRONMENT DEPLOYMENT:
 
 PRODUCTION ENVIRONMENTS:
@@ -438,56 +422,67 @@ MONITORING & OBSERVABILITY:
 • Metrics collection and dashboards
 • Error tracking and alerting
 • Performance monitoring and profiling
-    """
+""".strip()
+
+def create_deployment_architecture(pdf_pages, fig, ax):
+    """Create deployment architecture page"""
+    new_page(ax)
     
-    ax.text(5, 85, deployment_details.strip(), ha='left', va='top', fontsize=9,
+    # Title
+    ax.text(50, 95, 'Deployment Architecture', 
+            ha='center', va='center', fontsize=18, fontweight='bold')
+    
+    ax.text(5, 85, DEPLOYMENT_DETAILS_TEXT, ha='left', va='top', fontsize=9,
             bbox=dict(boxstyle="round,pad=1", facecolor='#F0FFF0', alpha=0.8))
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def add_diagrams_to_pdf(pdf_pages):
+    save_page(pdf_pages, fig)
+
+DIAGRAM_FILES = (
+    ('search_architecture.png', 'Search Architecture Diagram'),
+    ('elasticsearch_mapping.png', 'Elasticsearch Index Mapping'),
+    ('query_flow.png', 'Query Processing Flow'),
+    ('analytics_aggregation.png', 'Analytics Aggregation Structure'),
+)
+
+def present_diagrams():
+    """Paths and titles of the DIAGRAM_FILES that exist in the output directory,
+    found with one directory listing rather than a stat per file"""
+    try:
+        with os.scandir(output_dir()) as entries:
+            present = {entry.name for entry in entries}
+    except FileNotFoundError:
+        return []
+    return [(output_path(name), title) for name, title in DIAGRAM_FILES
+            if name in present]
+
+def add_diagrams_to_pdf(pdf_pages, fig, ax):
     """Add generated diagrams to PDF"""
-    diagram_files = [
-        ('/Users/agustin.fusaro/search_architecture.png', 'Search Architecture Diagram'),
-        ('/Users/agustin.fusaro/elasticsearch_mapping.png', 'Elasticsearch Index Mapping'),
-        ('/Users/agustin.fusaro/query_flow.png', 'Query Processing Flow'),
-        ('/Users/agustin.fusaro/analytics_aggregation.png', 'Analytics Aggregation Structure')
-    ]
-    
-    for diagram_path, title in diagram_files:
-        if os.path.exists(diagram_path):
-            fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-            ax.set_xlim(0, 100)
-            ax.set_ylim(0, 100)
-            ax.axis('off')
-            
-            # Title
-            ax.text(50, 95, title, ha='center', va='center', fontsize=16, fontweight='bold')
-            
-            # Load and display image
-            try:
-                img = mpimg.imread(diagram_path)
-                ax.imshow(img, extent=[5, 95, 10, 90], aspect='auto')
-            except Exception as e:
-                ax.text(50, 50, f'Error loading diagram: {str(e)}', 
-                       ha='center', va='center', fontsize=12)
-            
-            pdf_pages.savefig(fig, bbox_inches='tight')
-            plt.close()
-
-def create_conclusions_recommendations(pdf_pages):
-    """Create conclusions and recommendations page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+    from PIL import Image
     
-    # Title
-    ax.text(50, 95, 'Conclusions & Recommendations', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
+    # Pixel size of the image area at the figure's dpi. The diagrams are
+    # rendered at print resolution, so they are scaled down once with Pillow
+    # rather than resampled from full-size float arrays by matplotlib.
+    (x0, y0), (x1, y1) = ax.transData.transform([(5, 10), (95, 90)])
+    size = (round(x1 - x0), round(y1 - y0))
     
-    conclusions_text = """
+    for diagram_path, title in present_diagrams():
+        new_page(ax)
+        
+        # Title
+        ax.text(50, 95, title, ha='center', va='center', fontsize=16, fontweight='bold')
+        
+        # Load and display image
+        try:
+            with Image.open(diagram_path) as img:
+                img = img.resize(size, Image.Resampling.HAMMING)
+            ax.imshow(img, extent=[5, 95, 10, 90], aspect='auto')
+        except Exception as e:
+            ax.text(50, 50, f'Error loading diagram: {str(e)}', 
+                   ha='center', va='center', fontsize=12)
+        
+        save_page(pdf_pages, fig)
+
+CONCLUSIONS_TEXT = """
 STRENGTHS:
 
 ✅ ROBUST ARCHITECTURE
@@ -539,46 +534,67 @@ FUTURE CONSIDERATIONS:
 • Support for vector/semantic search capabilities
 • Advanced caching strategies (Redis integration)
 • Multi-tenancy improvements for better isolation
-    """
+""".strip()
+
+def create_conclusions_recommendations(pdf_pages, fig, ax):
+    """Create conclusions and recommendations page"""
+    new_page(ax)
+    
+    # Title
+    ax.text(50, 95, 'Conclusions & Recommendations', 
+            ha='center', va='center', fontsize=18, fontweight='bold')
     
-    ax.text(5, 85, conclusions_text.strip(), ha='left', va='top', fontsize=9,
+    ax.text(5, 85, CONCLUSIONS_TEXT, ha='left', va='top', fontsize=9,
             bbox=dict(boxstyle="round,pad=1", facecolor='#F5F5F5', alpha=0.8))
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+    save_page(pdf_pages, fig)
 
-def generate_pdf_report():
-    """Generate the complete PDF report"""
-    pdf_path = '/Users/agustin.fusaro/Case_Management_Search_Architecture_Report.pdf'
+def generate_pdf_report(force=False):
+    """Generate the complete PDF report, unless the existing one was built today
+    from the same source and diagrams (pass force=True to rebuild regardless).
+    The first run on a new day rebuilds it so the title page date is current."""
+    pdf_path = output_path('Case_Management_Search_Architecture_Report.pdf')
+    
+    digest = source_digest(__file__, *(diagram_path for diagram_path, _ in present_diagrams()),
+                           extra=GENERATED_AT)
+    if not force and is_up_to_date(pdf_path, digest):
+        print("Report is up to date, skipping regeneration")
+        return pdf_path
     
-    with PdfPages(pdf_path) as pdf_pages:
+    fig, ax = page_figure()
+    # The hidden 0-100 axes spans the whole letter page, so page coordinates
+    # are fixed and pages can be saved as-is, without a tight-bbox pass
+    fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
+    
+    with matplotlib.rc_context(PDF_RC), \
+            atomic_pdf(pdf_path, digest) as fh, PdfPages(fh, metadata=PDF_METADATA) as pdf_pages:
         print("Creating title page...")
-        create_title_page(pdf_pages)
+        create_title_page(pdf_pages, fig, ax)
         
         print("Creating executive summary...")
-        create_executive_summary(pdf_pages)
+        create_executive_summary(pdf_pages, fig, ax)
         
         print("Creating architecture overview...")
-        create_architecture_overview(pdf_pages)
+        create_architecture_overview(pdf_pages, fig, ax)
         
         print("Creating Elasticsearch details...")
-        create_elasticsearch_details(pdf_pages)
+        create_elasticsearch_details(pdf_pages, fig, ax)
         
         print("Creating analytics integration details...")
-        create_analytics_integration(pdf_pages)
+        create_analytics_integration(pdf_pages, fig, ax)
         
         print("Creating query processing flow...")
-        create_query_processing_flow(pdf_pages)
+        create_query_processing_flow(pdf_pages, fig, ax)
         
         print("Creating deployment architecture...")
-        create_deployment_architecture(pdf_pages)
+        create_deployment_architecture(pdf_pages, fig, ax)
         
         print("Adding diagrams...")
-        add_diagrams_to_pdf(pdf_pages)
+        add_diagrams_to_pdf(pdf_pages, fig, ax)
         
         print("Creating conclusions and recommendations...")
-        create_conclusions_recommendations(pdf_pages)
-        
+        create_conclusions_recommendations(pdf_pages, fig, ax)
+    
     return pdf_path
 
 if __name__ == "__main__":
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Case Management Search Documentation Generator
+Generates the architecture report and the search flow guide in one process,
+so both share a single interpreter start-up and matplotlib font cache
+"""
+import os
+
+from case_management_search_report import generate_pdf_report
+from case_management_search_flow_guide import generate_search_flow_guide
+
+if __name__ == "__main__":
+    print("Generating Case Management Search Architecture Report...")
+    report_path = generate_pdf_report()
+    print(f"✓ PDF report generated: {report_path}")
+    print(f"✓ File size: {os.path.getsize(report_path) / (1024*1024):.1f} MB")
+
+    print("\nGenerating Case Management Search Flow Guide...")
+    guide_path = generate_search_flow_guide()
+    print(f"✓ Guide generated: {guide_path}")
+    print(f"✓ File size: {os.path.getsize(guide_path) / (1024*1024):.1f} MB")
@@ -0,0 +1,139 @@
+"""
+PDF Output Helpers
+Shared by the Case Management search document generators: the core-font page
+setup, the write buffer, the source-digest sidecar that lets an unchanged
+document be skipped, and the atomic replacement of a finished PDF
+"""
+from contextlib import contextmanager
+import functools
+import hashlib
+import os
+import re
+import tempfile
+
+# rc settings the documents are rendered under. The standard 14 PDF fonts need
+# no subsetting or embedding, which is most of the cost of emitting text-heavy
+# pages, and their regular weight is "medium", which fonts() and the
+# font.weight default ask for. Those faces only resolve without fallback
+# lookups while pdf.use14corefonts is on.
+PDF_RC = {'pdf.use14corefonts': True, 'font.weight': 'medium'}
+
+# Write buffer for the PDF output, so PdfPages flushes pages in a few large
+# writes instead of many 8 KiB ones
+PDF_BUF = 1 << 20
+
+# Stand-ins for characters the core fonts' WinAnsi (cp1252) encoding lacks
+CORE_FONT_SUBSTITUTES = str.maketrans({'→': '->'})
+
+# A non-ASCII character, with the space that follows it as a section marker
+_NON_ASCII = re.compile(r'[^\x00-\x7f] ?')
+
+def core_font_text(text):
+    """*text* as the PDF core fonts can draw it: arrows become "->", and any
+    other character outside WinAnsi, such as an emoji section marker, is
+    dropped together with the space after it"""
+    def keep_encodable(match):
+        try:
+            match.group()[0].encode('cp1252')
+        except UnicodeEncodeError:
+            return ''
+        return match.group()
+    return _NON_ASCII.sub(keep_encodable, text.translate(CORE_FONT_SUBSTITUTES))
+
+def save_page(pdf_pages, fig, **kwargs):
+    """Save *fig* as the next PDF page, mapping every text on it through
+    core_font_text() first, so page sources keep their original characters"""
+    from matplotlib.text import Text
+    for text in fig.findobj(Text):
+        text.set_text(core_font_text(text.get_text()))
+    pdf_pages.savefig(fig, **kwargs)
+
+@functools.lru_cache(maxsize=None)
+def fonts():
+    """Font faces shared by every page, resolved once instead of per text call.
+    Regular faces use the "medium" weight of the PDF core fonts, so they are
+    meant to be drawn under PDF_RC."""
+    from matplotlib.font_manager import FontProperties
+    return {
+        'italic': FontProperties(style='italic', weight='medium'),
+        'bold': FontProperties(weight='bold'),
+        'mono': FontProperties(family='monospace', weight='medium'),
+    }
+
+def panel(xy, width, height, pad, **kwargs):
+    """Square-cornered panel covering the same area as a round,pad=<pad> FancyBboxPatch"""
+    from matplotlib.patches import Rectangle
+    x, y = xy
+    return Rectangle((x - pad, y - pad), width + 2 * pad, height + 2 * pad, **kwargs)
+
+def page_figure(dpi=None):
+    """A letter-size figure and its hidden 0-100 axes, reused for every page of
+    a document: the axes only places content, so it is configured once and
+    each page just swaps its artists. The figure is bound straight to the PDF
+    canvas, bypassing pyplot's figure manager. At dpi=72 one figure unit is
+    one PDF point."""
+    from matplotlib.backends.backend_pdf import FigureCanvasPdf
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8.5, 11), dpi=dpi)
+    FigureCanvasPdf(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    ax.set_xlim(0, 100)
+    ax.set_ylim(0, 100)
+    ax.axis('off')
+    return fig, ax
+
+def output_dir():
+    """Directory the generated documents and diagrams are written to: the one
+    named by the CM_DOC_OUT_DIR environment variable, or by default the one
+    holding these scripts, next to which the generated documents are kept"""
+    return os.environ.get('CM_DOC_OUT_DIR', os.path.dirname(os.path.abspath(__file__)))
+
+def output_path(name):
+    """Path of the generated file *name* in output_dir()"""
+    return os.path.join(output_dir(), name)
+
+def source_digest(*paths, extra=''):
+    """SHA-256 of the named files, which together determine a document's pages,
+    plus any *extra* runtime text the pages print. Names are hashed without
+    their directory, so the digest does not depend on where the generator is
+    run from."""
+    sha = hashlib.sha256(extra.encode())
+    for path in paths:
+        sha.update(os.path.basename(path).encode())
+        with open(path, 'rb') as fh:
+            sha.update(fh.read())
+    return sha.hexdigest()
+
+def is_up_to_date(pdf_path, digest):
+    """Whether pdf_path exists and its .sha sidecar records *digest*"""
+    try:
+        with open(pdf_path + '.sha') as fh:
+            recorded = fh.read().strip()
+    except FileNotFoundError:
+        return False
+    return recorded == digest and os.path.exists(pdf_path)
+
+@contextmanager
+def atomic_pdf(pdf_path, digest):
+    """Yield a buffered binary file that replaces pdf_path only once the block
+    completes, then record *digest* in the .sha sidecar. The PDF is written to
+    a temporary file next to the target and renamed into place, so a failed or
+    interrupted run leaves the previous document, and its sidecar, intact."""
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf', dir=os.path.dirname(os.path.abspath(pdf_path)))
+    # Wrapped at once, so closing fh always releases the descriptor
+    fh = os.fdopen(fd, 'wb', buffering=PDF_BUF)
+    try:
+        with fh:
+            yield fh
+        # mkstemp creates the file owner-only; give it the mode open() would,
+        # which is only readable by others if the umask allows it
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, pdf_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    with open(pdf_path + '.sha', 'w') as sidecar:
+        sidecar.write(digest)
@@ -4,66 +4,88 @@ SearchFacetValues Deep Dive Guide Generator
 Creates a comprehensive PDF guide explaining the SearchFacetValues endpoint
 with detailed parameter explanations, flow diagrams, and examples
 """
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-from matplotlib.patches import FancyBboxPatch, Rectangle, ConnectionPatch
-import matplotlib.patches as mpatches
+from dataclasses import dataclass
 from datetime import datetime
+import os
 import textwrap
-import json
 
-def create_title_page(pdf_pages):
+from pdf_output import PDF_RC, atomic_pdf, fonts, is_up_to_date, output_path, page_figure, panel, save_page, source_digest
+
+# Matplotlib is imported where it is first needed, so importing this module
+# does not pay its startup cost.
+
+# Formatted once so the title page and the source digest agree on the date; a
+# guide skipped as up to date never carries a stale date
+GENERATED_AT = datetime.now().strftime("%B %d, %Y")
+
+# The guide's text-heavy content streams deflate slightly better at the
+# highest compression level
+GUIDE_RC = {**PDF_RC, 'pdf.compression': 9}
+
+def new_page(ax):
+    """Remove the previous page's text, boxes and arrows from the shared axes.
+    A full ax.clear() would also rebuild the tick machinery, which these
+    hidden axes never draw, and reset the limits set up once for the guide."""
+    for artist in [*ax.texts, *ax.patches, *ax.collections]:
+        artist.remove()
+
+@dataclass(frozen=True)
+class TextPage:
+    """A page holding one body of text under a centered heading. Calling it
+    draws and saves the page, like the create_* page functions."""
+    title: str
+    body: str
+    fontsize: float
+    font: str = None
+    title_size: float = 18
+    
+    def __call__(self, pdf_pages, fig, ax):
+        new_page(ax)
+        ax.text(50, 95, self.title, ha='center', va='center', fontsize=self.title_size,
+                fontproperties=fonts()['bold'])
+        ax.text(5, 85, self.body, ha='left', va='top', fontsize=self.fontsize,
+                fontproperties=fonts()[self.font] if self.font else None)
+        save_page(pdf_pages, fig, bbox_inches='tight')
+
+def create_title_page(pdf_pages, fig, ax):
     """Create the title page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+    new_page(ax)
     
     # Main title
     ax.text(50, 75, 'SearchFacetValues', 
-            ha='center', va='center', fontsize=32, fontweight='bold', color='#2E4A8B')
+            ha='center', va='center', fontsize=32, fontproperties=fonts()['bold'], color='#2E4A8B')
     ax.text(50, 68, 'Deep Dive Guide', 
-            ha='center', va='center', fontsize=24, fontweight='bold', color='#2E4A8B')
+            ha='center', va='center', fontsize=24, fontproperties=fonts()['bold'], color='#2E4A8B')
     
     # Subtitle
     ax.text(50, 58, 'Complete End-to-End Analysis', 
-            ha='center', va='center', fontsize=18, style='italic', color='#4A4A4A')
+            ha='center', va='center', fontsize=18, fontproperties=fonts()['italic'], color='#4A4A4A')
     
     # Description box
-    desc_box = FancyBboxPatch((10, 45), 80, 8, boxstyle="round,pad=1", 
-                             facecolor='#E8F4FD', edgecolor='#2E4A8B', linewidth=2)
+    desc_box = panel((10, 45), 80, 8, pad=1, 
+                     facecolor='#E8F4FD', edgecolor='#2E4A8B', linewidth=2)
     ax.add_patch(desc_box)
     ax.text(50, 49, 'Understanding Parameters, Processing Flow, Elasticsearch Integration,\nand Result Generation in Case Management Search', 
-            ha='center', va='center', fontsize=12, fontweight='bold')
+            ha='center', va='center', fontsize=12, fontproperties=fonts()['bold'])
     
     # Key features
-    features_box = FancyBboxPatch((15, 25), 70, 15, boxstyle="round,pad=0.5", 
-                                 facecolor='#F8F9FA', edgecolor='#6C757D', linewidth=1)
+    features_box = panel((15, 25), 70, 15, pad=0.5, 
+                         facecolor='#F8F9FA', edgecolor='#6C757D', linewidth=1)
     ax.add_patch(features_box)
-    ax.text(50, 35, 'What You\'ll Learn', ha='center', va='center', fontsize=14, fontweight='bold')
+    ax.text(50, 35, 'What You\'ll Learn', ha='center', va='center', fontsize=14, fontproperties=fonts()['bold'])
     ax.text(50, 29, '• Parameter-by-parameter breakdown with examples\n• Complete request processing flow with diagrams\n• Elasticsearch query generation and execution\n• Real-world use cases and practical applications\n• Performance considerations and optimization tips', 
             ha='center', va='center', fontsize=11)
     
     # Footer
-    ax.text(50, 15, f'Generated on: {datetime.now().strftime("%B %d, %Y")}', 
+    ax.text(50, 15, f'Generated on: {GENERATED_AT}', 
             ha='center', va='center', fontsize=12, color='#6C757D')
     ax.text(50, 10, 'Datadog Case Management Technical Documentation', 
-            ha='center', va='center', fontsize=10, style='italic', color='#6C757D')
+            ha='center', va='center', fontsize=10, fontproperties=fonts()['italic'], color='#6C757D')
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+    save_page(pdf_pages, fig, bbox_inches='tight')
 
-def create_overview_page(pdf_pages):
-    """Create overview page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'SearchFacetValues Overview', 
-            ha='center', va='center', fontsize=20, fontweight='bold')
-    
-    overview_text = """
+# Reflowed once at import; the page only places the finished block
+OVERVIEW_TEXT = textwrap.fill("""
 The SearchFacetValues endpoint is a sophisticated facet search system that enables users to discover and explore available values within specific fields (facets) of their case data. This endpoint serves as the backbone for dropdown menus, autocomplete suggestions, and filter discovery in the Case Management user interface.
 
 Unlike basic search operations that return individual case documents, SearchFacetValues performs aggregation-based queries that extract unique values from specified fields across filtered datasets. This approach provides users with contextual facet values that are relevant to their current search scope, dramatically improving the search and filtering experience.
@@ -77,27 +99,21 @@ Each parameter serves a specific purpose in the facet extraction pipeline. The o
 The processing flow involves multiple sophisticated steps: request validation, query parsing using ANTLR grammar, security filter application, Elasticsearch aggregation construction, query execution with timeout handling, result extraction and processing, value enrichment through external services, and final response formatting. Each step includes comprehensive error handling and performance optimizations.
 
 This endpoint demonstrates the power of Elasticsearch aggregations combined with intelligent query processing, security filtering, and user experience optimization. Understanding its operation provides insight into modern search system design and the complexities involved in providing intuitive, secure, and performant facet search capabilities.
-    """
+""", width=80)
+
+def create_overview_page(pdf_pages, fig, ax):
+    """Create overview page"""
+    new_page(ax)
+    
+    ax.text(50, 95, 'SearchFacetValues Overview', 
+            ha='center', va='center', fontsize=20, fontproperties=fonts()['bold'])
     
-    wrapped_text = textwrap.fill(overview_text, width=80)
-    ax.text(5, 85, wrapped_text, ha='left', va='top', fontsize=10, 
+    ax.text(5, 85, OVERVIEW_TEXT, ha='left', va='top', fontsize=10, 
             bbox=dict(boxstyle="round,pad=1", facecolor='#F8F9FA', alpha=0.8))
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+    save_page(pdf_pages, fig, bbox_inches='tight')
 
-def create_request_structure_page(pdf_pages):
-    """Create request structure page with parameter details"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Request Structure & Parameters', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    # Protobuf definition
-    protobuf_text = """SearchFacetValuesRequest Structure:
+PROTOBUF_TEXT = """SearchFacetValuesRequest Structure:
 
 message SearchFacetValuesRequest {
   uint64 org_id = 1;        // Organization identifier (required)
@@ -107,12 +123,8 @@ message SearchFacetValuesRequest {
   int32 limit = 5;          // Result count limit (optional, 1-100)
   WorkType work_type = 6;   // Content type scope (optional)
 }"""
-    
-    ax.text(5, 85, protobuf_text, ha='left', va='top', fontsize=10, 
-            fontfamily='monospace', bbox=dict(boxstyle="round,pad=0.5", facecolor='#FFF3CD'))
-    
-    # Parameter breakdown
-    params_text = """
+
+PARAMS_TEXT = """
 PARAMETER BREAKDOWN:
 
 1. org_id (uint64, required)
@@ -150,75 +162,80 @@ PARAMETER BREAKDOWN:
    DEFAULT: CASE if not specified
    ISOLATION: Ensures API separation between work types
    EXAMPLES: CASE, INCIDENT
-    """
+"""
+
+def create_request_structure_page(pdf_pages, fig, ax):
+    """Create request structure page with parameter details"""
+    new_page(ax)
     
-    ax.text(5, 65, params_text, ha='left', va='top', fontsize=9)
+    ax.text(50, 95, 'Request Structure & Parameters', 
+            ha='center', va='center', fontsize=18, fontproperties=fonts()['bold'])
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_processing_flow_diagram(pdf_pages):
+    # Protobuf definition
+    ax.text(5, 85, PROTOBUF_TEXT, ha='left', va='top', fontsize=10, 
+            fontproperties=fonts()['mono'], bbox=dict(boxstyle="round,pad=0.5", facecolor='#FFF3CD'))
+    
+    # Parameter breakdown
+    ax.text(5, 65, PARAMS_TEXT, ha='left', va='top', fontsize=9)
+    
+    save_page(pdf_pages, fig, bbox_inches='tight')
+
+# Processing flow steps: (title, description, y, color)
+FLOW_STEPS = (
+    ('1. Request Validation', 'Protobuf validation\nParameter range checking\nFacet support verification', 88, '#FFE5E5'),
+    ('2. Query Parsing', 'ANTLR grammar parsing\nAST generation\nField resolution', 78, '#FFCCCB'),
+    ('3. Security Filtering', 'Org ID injection\nProject access control\nWork type scoping', 68, '#FFE5B4'),
+    ('4. ES Query Building', 'Bool query construction\nSecurity filter integration\nField mapping', 58, '#E5F3FF'),
+    ('5. Aggregation Setup', 'Terms aggregation\nInclude pattern setup\nSize/shard_size config', 48, '#E5FFE5'),
+    ('6. Query Execution', 'Elasticsearch request\nTimeout handling\nResult collection', 38, '#F0E5FF'),
+    ('7. Result Processing', 'Aggregation extraction\nBucket processing\nCount calculation', 28, '#FFF0E5'),
+    ('8. Value Enrichment', 'UUID resolution\nUser service calls\nName/email mapping', 18, '#E5FFFF'),
+    ('9. Response Formatting', 'Protobuf construction\nField name setting\nFinal validation', 8, '#F5F5F5'),
+)
+
+# Side annotations grouping the flow steps: (label, y, color)
+FLOW_PHASES = (
+    ('Input\nValidation', 85, '#FFE5E5'),
+    ('Query\nProcessing', 65, '#E5F3FF'),
+    ('ES\nExecution', 45, '#E5FFE5'),
+    ('Result\nProcessing', 25, '#E5FFFF'),
+)
+
+def create_processing_flow_diagram(pdf_pages, fig, ax):
     """Create processing flow diagram"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import FancyArrow
     
-    ax.text(50, 95, 'SearchFacetValues Processing Flow', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
+    new_page(ax)
     
-    # Flow steps with different colors
-    steps = [
-        ('1. Request Validation', 'Protobuf validation\nParameter range checking\nFacet support verification', 88, '#FFE5E5'),
-        ('2. Query Parsing', 'ANTLR grammar parsing\nAST generation\nField resolution', 78, '#FFCCCB'),
-        ('3. Security Filtering', 'Org ID injection\nProject access control\nWork type scoping', 68, '#FFE5B4'),
-        ('4. ES Query Building', 'Bool query construction\nSecurity filter integration\nField mapping', 58, '#E5F3FF'),
-        ('5. Aggregation Setup', 'Terms aggregation\nInclude pattern setup\nSize/shard_size config', 48, '#E5FFE5'),
-        ('6. Query Execution', 'Elasticsearch request\nTimeout handling\nResult collection', 38, '#F0E5FF'),
-        ('7. Result Processing', 'Aggregation extraction\nBucket processing\nCount calculation', 28, '#FFF0E5'),
-        ('8. Value Enrichment', 'UUID resolution\nUser service calls\nName/email mapping', 18, '#E5FFFF'),
-        ('9. Response Formatting', 'Protobuf construction\nField name setting\nFinal validation', 8, '#F5F5F5')
-    ]
+    ax.text(50, 95, 'SearchFacetValues Processing Flow', 
+            ha='center', va='center', fontsize=18, fontproperties=fonts()['bold'])
     
-    for i, (title, desc, y, color) in enumerate(steps):
+    # Step boxes and the arrows between them are drawn as one collection
+    shapes = []
+    for i, (title, desc, y, color) in enumerate(FLOW_STEPS):
         # Step box
-        step_box = FancyBboxPatch((10, y-4), 80, 7, boxstyle="round,pad=0.3", 
-                                 facecolor=color, edgecolor='black', linewidth=1)
-        ax.add_patch(step_box)
+        shapes.append(panel((10, y-4), 80, 7, pad=0.3, 
+                            facecolor=color, edgecolor='black', linewidth=1))
         
         # Step title and description
-        ax.text(12, y, title, ha='left', va='center', fontsize=11, fontweight='bold')
+        ax.text(12, y, title, ha='left', va='center', fontsize=11, fontproperties=fonts()['bold'])
         ax.text(12, y-2, desc, ha='left', va='center', fontsize=9)
         
         # Arrow to next step (except for last step)
-        if i < len(steps) - 1:
-            ax.arrow(50, y-4, 0, -3, head_width=1.5, head_length=0.8, 
-                    fc='#4A4A4A', ec='#4A4A4A', linewidth=1)
+        if i < len(FLOW_STEPS) - 1:
+            shapes.append(FancyArrow(50, y-4, 0, -3, head_width=1.5, head_length=0.8, 
+                                     fc='#4A4A4A', ec='#4A4A4A', linewidth=1))
+    ax.add_collection(PatchCollection(shapes, match_original=True))
     
     # Side annotations
-    ax.text(92, 85, 'Input\nValidation', ha='center', va='center', fontsize=8, 
-            rotation=90, bbox=dict(boxstyle="round,pad=0.2", facecolor='#FFE5E5'))
-    ax.text(92, 65, 'Query\nProcessing', ha='center', va='center', fontsize=8, 
-            rotation=90, bbox=dict(boxstyle="round,pad=0.2", facecolor='#E5F3FF'))
-    ax.text(92, 45, 'ES\nExecution', ha='center', va='center', fontsize=8, 
-            rotation=90, bbox=dict(boxstyle="round,pad=0.2", facecolor='#E5FFE5'))
-    ax.text(92, 25, 'Result\nProcessing', ha='center', va='center', fontsize=8, 
-            rotation=90, bbox=dict(boxstyle="round,pad=0.2", facecolor='#E5FFFF'))
+    for label, y, color in FLOW_PHASES:
+        ax.text(92, y, label, ha='center', va='center', fontsize=8, 
+                rotation=90, bbox=dict(boxstyle="round,pad=0.2", facecolor=color))
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_elasticsearch_integration_page(pdf_pages):
-    """Create Elasticsearch integration details page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Elasticsearch Integration Details', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    es_details = """
+    save_page(pdf_pages, fig, bbox_inches='tight')
+
+ES_DETAILS_TEXT = """
 INDEX AND DOCUMENT STRUCTURE
 
 Target Index: "cases-read"
@@ -295,24 +312,9 @@ Query Timeout: Configurable timeout (default 5 seconds) with context cancellatio
 Memory Management: Aggregations use doc values to minimize heap usage
 Shard Distribution: Shard size optimization ensures accurate results across distributed shards
 Pattern Efficiency: Short filters use prefix patterns, longer filters use wildcard patterns
-    """
-    
-    ax.text(5, 85, es_details, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_example_scenarios_page(pdf_pages):
-    """Create example scenarios page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Real-World Example Scenarios', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    examples_text = """
+"""
+
+SCENARIOS_TEXT = """
 SCENARIO 1: ASSIGNEE DISCOVERY FOR OPEN HIGH-PRIORITY CASES
 
 Request:
@@ -408,82 +410,9 @@ Response:
 }
 
 Use Case: Autocomplete suggestions as user types "hi" in priority filter
-    """
-    
-    ax.text(5, 85, examples_text, ha='left', va='top', fontsize=8, fontfamily='monospace')
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+"""
 
-def create_facet_mapping_diagram(pdf_pages):
-    """Create facet field mapping diagram"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Facet Field Mapping Architecture', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    # User facets column
-    user_box = FancyBboxPatch((5, 70), 25, 20, boxstyle="round,pad=0.5", 
-                             facecolor='#E8F4FD', edgecolor='#2E4A8B', linewidth=2)
-    ax.add_patch(user_box)
-    ax.text(17.5, 87, 'User Facet Names', ha='center', va='center', fontsize=12, fontweight='bold')
-    
-    user_facets = [
-        'assignee',
-        'status', 
-        'priority',
-        'project',
-        'service',
-        'team',
-        'responder.name',
-        'custom_attributes.env'
-    ]
-    
-    for i, facet in enumerate(user_facets):
-        ax.text(17.5, 84-i*1.5, f'"{facet}"', ha='center', va='center', fontsize=9, fontfamily='monospace')
-    
-    # Elasticsearch fields column
-    es_box = FancyBboxPatch((70, 70), 25, 20, boxstyle="round,pad=0.5", 
-                           facecolor='#F0E68C', edgecolor='#8B8000', linewidth=2)
-    ax.add_patch(es_box)
-    ax.text(82.5, 87, 'ES Field Paths', ha='center', va='center', fontsize=12, fontweight='bold')
-    
-    es_fields = [
-        'assignee_id',
-        'status',
-        'priority', 
-        'project_id',
-        'attributes.service',
-        'attributes.team',
-        'on_call.responder_users.uuid',
-        'custom_attributes[nested]'
-    ]
-    
-    for i, field in enumerate(es_fields):
-        ax.text(82.5, 84-i*1.5, field, ha='center', va='center', fontsize=8, fontfamily='monospace')
-    
-    # Mapping arrows
-    for i in range(len(user_facets)):
-        ax.arrow(30, 84-i*1.5, 38, 0, head_width=0.5, head_length=2, 
-                fc='#4A4A4A', ec='#4A4A4A', linewidth=1)
-    
-    # Mapping process box
-    process_box = FancyBboxPatch((35, 75), 30, 10, boxstyle="round,pad=0.5", 
-                                facecolor='#FFE5B4', edgecolor='#FF8C00', linewidth=2)
-    ax.add_patch(process_box)
-    ax.text(50, 80, 'getCorrespondingField()', ha='center', va='center', fontsize=11, fontweight='bold')
-    ax.text(50, 77, 'Field Mapping Function', ha='center', va='center', fontsize=9)
-    
-    # Special handling section
-    special_box = FancyBboxPatch((10, 45), 80, 20, boxstyle="round,pad=0.5", 
-                                facecolor='#F5F5F5', edgecolor='#6C757D', linewidth=1)
-    ax.add_patch(special_box)
-    ax.text(50, 62, 'Special Field Handling', ha='center', va='center', fontsize=14, fontweight='bold')
-    
-    special_text = """
+SPECIAL_FIELDS_TEXT = """
 RESPONDER FIELDS: UUID Resolution Required
 • responder.name/email → additional_properties.on_call.responder_users.uuid
 • System queries UUIDs, then resolves to names/emails via UserService
@@ -503,24 +432,71 @@ FLATTENED OBJECTS: Direct Path Access
 • service, team, version → attributes.{field_name}
 • Stored in flattened object for efficient querying
 • Direct field access without nested complexity
-    """
+"""
+
+# User facet names and the ES field paths getCorrespondingField() maps them to
+FACET_MAP = (
+    ('assignee', 'assignee_id'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('project', 'project_id'),
+    ('service', 'attributes.service'),
+    ('team', 'attributes.team'),
+    ('responder.name', 'on_call.responder_users.uuid'),
+    ('custom_attributes.env', 'custom_attributes[nested]'),
+)
+
+def create_facet_mapping_diagram(pdf_pages, fig, ax):
+    """Create facet field mapping diagram"""
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import FancyArrow, FancyBboxPatch
     
-    ax.text(12, 57, special_text, ha='left', va='top', fontsize=9)
+    new_page(ax)
     
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_performance_optimization_page(pdf_pages):
-    """Create performance optimization page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
+    ax.text(50, 95, 'Facet Field Mapping Architecture', 
+            ha='center', va='center', fontsize=18, fontproperties=fonts()['bold'])
+    
+    # Boxes and mapping arrows are drawn as one collection, in this order, so
+    # the function box still sits on top of the arrows it interrupts
+    shapes = []
     
-    ax.text(50, 95, 'Performance Optimization & Best Practices', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
+    # User facets column
+    shapes.append(FancyBboxPatch((5, 70), 25, 20, boxstyle="round,pad=0.5", 
+                                 facecolor='#E8F4FD', edgecolor='#2E4A8B', linewidth=2))
+    ax.text(17.5, 87, 'User Facet Names', ha='center', va='center', fontsize=12, fontproperties=fonts()['bold'])
     
-    perf_text = """
+    # Elasticsearch fields column
+    shapes.append(FancyBboxPatch((70, 70), 25, 20, boxstyle="round,pad=0.5", 
+                                 facecolor='#F0E68C', edgecolor='#8B8000', linewidth=2))
+    ax.text(82.5, 87, 'ES Field Paths', ha='center', va='center', fontsize=12, fontproperties=fonts()['bold'])
+    
+    # One row per mapping, each centered on the y of its arrow
+    for i, (facet, field) in enumerate(FACET_MAP):
+        ax.text(17.5, 84-i*1.5, f'"{facet}"', ha='center', va='center', fontsize=9, fontproperties=fonts()['mono'])
+        ax.text(82.5, 84-i*1.5, field, ha='center', va='center', fontsize=8, fontproperties=fonts()['mono'])
+    
+    # Mapping arrows
+    shapes.extend(FancyArrow(30, 84-i*1.5, 38, 0, head_width=0.5, head_length=2, 
+                             fc='#4A4A4A', ec='#4A4A4A', linewidth=1)
+                  for i in range(len(FACET_MAP)))
+    
+    # Mapping process box
+    shapes.append(FancyBboxPatch((35, 75), 30, 10, boxstyle="round,pad=0.5", 
+                                 facecolor='#FFE5B4', edgecolor='#FF8C00', linewidth=2))
+    ax.text(50, 80, 'getCorrespondingField()', ha='center', va='center', fontsize=11, fontproperties=fonts()['bold'])
+    ax.text(50, 77, 'Field Mapping Function', ha='center', va='center', fontsize=9)
+    
+    # Special handling section
+    shapes.append(panel((10, 45), 80, 20, pad=0.5, 
+                        facecolor='#F5F5F5', edgecolor='#6C757D', linewidth=1))
+    ax.add_collection(PatchCollection(shapes, match_original=True))
+    ax.text(50, 62, 'Special Field Handling', ha='center', va='center', fontsize=14, fontproperties=fonts()['bold'])
+    
+    ax.text(12, 57, SPECIAL_FIELDS_TEXT, ha='left', va='top', fontsize=9)
+    
+    save_page(pdf_pages, fig, bbox_inches='tight')
+
+PERF_TEXT = """
 ELASTICSEARCH AGGREGATION OPTIMIZATIONS
 
 Execution Hints: The system uses "map" execution hint for terms aggregations, which provides 
@@ -598,24 +574,9 @@ PERFORMANCE MONITORING
 The system provides comprehensive logging of execution times, query complexity, and result sizes. 
 Key metrics include parse time, ES query execution time, user resolution time, and total request 
 processing time. These metrics enable identification of bottlenecks and optimization opportunities.
-    """
-    
-    ax.text(5, 85, perf_text, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_error_handling_page(pdf_pages):
-    """Create error handling and troubleshooting page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Error Handling & Troubleshooting', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    error_text = """
+"""
+
+ERROR_TEXT = """
 COMMON ERROR SCENARIOS AND RESOLUTIONS
 
 1. UNSUPPORTED FACET ERROR
@@ -727,24 +688,9 @@ Set up alerts for:
 - Memory usage > 80% during aggregations
 - User service failure rates > 1%
 - Response time P95 > 2 seconds
-    """
-    
-    ax.text(5, 85, error_text, ha='left', va='top', fontsize=8)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_use_cases_page(pdf_pages):
-    """Create practical use cases page"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Practical Use Cases & Integration Patterns', 
-            ha='center', va='center', fontsize=18, fontweight='bold')
-    
-    use_cases_text = """
+"""
+
+USE_CASES_TEXT = """
 FRONTEND INTEGRATION PATTERNS
 
 1. DROPDOWN FILTER POPULATION
@@ -864,24 +810,9 @@ PERFORMANCE MONITORING IN PRODUCTION
    - Alert on slow facet queries (>2s response time)
    - Track facet value cardinality changes over time
    - Monitor memory usage during high-cardinality aggregations
-    """
-    
-    ax.text(5, 85, use_cases_text, ha='left', va='top', fontsize=9)
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
-
-def create_appendix_examples(pdf_pages):
-    """Create appendix with complete examples"""
-    fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-    ax.set_xlim(0, 100)
-    ax.set_ylim(0, 100)
-    ax.axis('off')
-    
-    ax.text(50, 95, 'Appendix: Complete Request/Response Examples', 
-            ha='center', va='center', fontsize=16, fontweight='bold')
-    
-    examples_text = """
+"""
+
+APPENDIX_EXAMPLES_TEXT = """
 EXAMPLE 1: BASIC ASSIGNEE FACET REQUEST
 
 Request:
@@ -1025,51 +956,46 @@ Response:
     {"field_value": "ARCHIVED", "count": 23}
   ]
 }
-    """
-    
-    ax.text(5, 85, examples_text, ha='left', va='top', fontsize=8, fontfamily='monospace')
-    
-    pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close()
+"""
 
-def generate_search_facet_values_guide():
-    """Generate the complete SearchFacetValues deep dive PDF"""
-    pdf_path = '/Users/agustin.fusaro/SearchFacetValues_Deep_Dive_Guide.pdf'
+# (progress label, page builder) in document order
+PAGES = (
+    ('title page', create_title_page),
+    ('overview page', create_overview_page),
+    ('request structure page', create_request_structure_page),
+    ('processing flow diagram', create_processing_flow_diagram),
+    ('Elasticsearch integration page',
+     TextPage('Elasticsearch Integration Details', ES_DETAILS_TEXT, 9)),
+    ('facet mapping diagram', create_facet_mapping_diagram),
+    ('example scenarios', TextPage('Real-World Example Scenarios', SCENARIOS_TEXT, 8, font='mono')),
+    ('performance optimization page',
+     TextPage('Performance Optimization & Best Practices', PERF_TEXT, 9)),
+    ('error handling page', TextPage('Error Handling & Troubleshooting', ERROR_TEXT, 8)),
+    ('use cases page', TextPage('Practical Use Cases & Integration Patterns', USE_CASES_TEXT, 9)),
+    ('appendix', TextPage('Appendix: Complete Request/Response Examples', APPENDIX_EXAMPLES_TEXT, 8,
+                          font='mono', title_size=16)),
+)
+
+def generate_search_facet_values_guide(force=False):
+    """Generate the complete SearchFacetValues deep dive PDF, unless the existing
+    one was built today from the same source (pass force=True to rebuild regardless)"""
+    pdf_path = output_path('SearchFacetValues_Deep_Dive_Guide.pdf')
+    
+    digest = source_digest(__file__, extra=GENERATED_AT)
+    if not force and is_up_to_date(pdf_path, digest):
+        print("Guide is up to date, skipping regeneration")
+        return pdf_path
+    
+    import matplotlib
+    from matplotlib.backends.backend_pdf import PdfPages
+    
+    fig, ax = page_figure(dpi=72)
+    with atomic_pdf(pdf_path, digest) as fh, matplotlib.rc_context(GUIDE_RC), \
+            PdfPages(fh) as pdf_pages:
+        for label, create_page in PAGES:
+            print(f"Creating {label}...")
+            create_page(pdf_pages, fig, ax)
     
-    with PdfPages(pdf_path) as pdf_pages:
-        print("Creating title page...")
-        create_title_page(pdf_pages)
-        
-        print("Creating overview page...")
-        create_overview_page(pdf_pages)
-        
-        print("Creating request structure page...")
-        create_request_structure_page(pdf_pages)
-        
-        print("Creating processing flow diagram...")
-        create_processing_flow_diagram(pdf_pages)
-        
-        print("Creating Elasticsearch integration page...")
-        create_elasticsearch_integration_page(pdf_pages)
-        
-        print("Creating facet mapping diagram...")
-        create_facet_mapping_diagram(pdf_pages)
-        
-        print("Creating example scenarios...")
-        create_example_scenarios_page(pdf_pages)
-        
-        print("Creating performance optimization page...")
-        create_performance_optimization_page(pdf_pages)
-        
-        print("Creating error handling page...")
-        create_error_handling_page(pdf_pages)
-        
-        print("Creating use cases page...")
-        create_use_cases_page(pdf_pages)
-        
-        print("Creating appendix...")
-        create_appendix_examples(pdf_pages)
-        
     return pdf_path
 
 if __name__ == "__main__":
@@ -1077,7 +1003,6 @@ if __name__ == "__main__":
     pdf_path = generate_search_facet_values_guide()
     print(f"✓ Guide generated: {pdf_path}")
     
-    import os
     file_size = os.path.getsize(pdf_path) / (1024*1024)
     print(f"✓ File size: {file_size:.1f} MB")
     print(f"✓ Complete deep dive with diagrams and examples")
\ No newline at end of file